@@ -0,0 +1,45 @@
+from multiprocessing import Pool
+from webpage import WebPage
+
+# Each process of the pool analyses source codes with its own copy of these values (cf. AnalysisPool)
+worker_seocheckmanager = None
+worker_backend = "python"
+
+def init_worker(seocheckmanager, backend):
+    global worker_seocheckmanager, worker_backend
+    worker_seocheckmanager = seocheckmanager
+    worker_backend = backend
+
+def extract_source_code(source_code):
+    """
+    Parse source_code and return the data extracted from it (cf. WebPage.extract)
+    """
+
+    webpageparser = WebPage.create_parser(worker_seocheckmanager, worker_backend)
+    webpageparser.feed(source_code)
+    return WebPage.extract(webpageparser, worker_seocheckmanager)
+
+class AnalysisPool:
+    def __init__(self, processes, seocheckmanager, backend="python"):
+        """
+        Initialise an instance of AnalysisPool
+
+        Parsing and extraction are CPU-bound: AnalysisPool carries them out in several processes
+        Source codes are sent to the processes, which send back the extractions (cf. WebPage.extract)
+        the main process then reports them into the website (cf. WebPage.apply_extraction)
+
+        seocheckmanager and backend are copied once into each process
+        """
+
+        self.pool_ = Pool(processes, init_worker, (seocheckmanager, backend))
+
+    def extract(self, source_codes):
+        """
+        Return the extractions of source_codes (in the same order)
+        """
+
+        return self.pool_.map(extract_source_code, source_codes, 1)
+
+    def close(self):
+        self.pool_.close()
+        self.pool_.join()
@@ -0,0 +1,130 @@
+import os
+import zlib
+import struct
+import cPickle as pickle
+from threading import Thread
+from Queue import Queue
+
+class Checkpoint:
+    def __init__(self, path):
+        """
+        Initialise an instance of Checkpoint
+
+        Checkpoint saves the state of a crawl into path so that it can be resumed later
+        The file is a log of records: the first one describes the crawl,
+        then each save appends the pages discovered or scanned since the previous one
+        Saves only take the states of these pages, compression and writes are carried out in a background thread
+        """
+
+        self.path_ = path
+        self.num_saved_ = None # number of pages in the log, None => no log for the current crawl
+        self.records_ = Queue() # (new file, record) to be written, None => end of the writer
+        self.writer_ = None
+
+    def exists(self):
+        return os.path.isfile(self.path_)
+
+    def save(self, start_url, parameters, webpages, cursor_webpages_pos, scanned_webpages):
+        """
+        Save the state of the crawl
+
+        Only the pages discovered since the previous save and the ones of scanned_webpages are saved,
+        their states are taken immediately
+        Records are written in the order of the saves, even if the previous one is still being written
+        """
+
+        if self.num_saved_ is None:
+            self.records_.put((True, {"start-url": start_url, "parameters": parameters}))
+            self.num_saved_ = 0
+
+        states = [(wp.id, wp.get_state()) for wp in scanned_webpages if wp.id < self.num_saved_]
+        states += [(wp.id, wp.get_state()) for wp in webpages[self.num_saved_:]]
+        self.num_saved_ = len(webpages)
+        self.records_.put((False, {"cursor": cursor_webpages_pos, "webpages": states}))
+
+        if not self.writer_:
+            self.writer_ = Thread(target=self.write)
+            self.writer_.daemon = True
+            self.writer_.start()
+
+    def write(self):
+        """
+        Append the records of save to the file until wait is called
+        """
+
+        while True:
+            record = self.records_.get()
+            if record is None:
+                return
+
+            new_file, data = record
+            data = zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+            try:
+                with open(self.path_, "wb" if new_file else "ab") as f:
+                    f.write(struct.pack("<I", len(data)))
+                    f.write(data)
+            except IOError as err:
+                print "Checkpoint not written to '%s': %s" % (self.path_, err)
+
+    def load(self):
+        """
+        Return the state of the crawl saved by save: dictionary with start-url, parameters, cursor and webpages (states)
+        None if the file does not contain any page
+
+        Records are replayed in the order of the saves
+        a record partially written (eg. crawl interrupted during a write) is ignored and removed from the file
+        later saves are appended to the loaded crawl
+        """
+
+        snapshot = None
+        states = list()
+        with open(self.path_, "r+b") as f:
+            valid_size = 0
+            while True:
+                header = f.read(4)
+                if len(header) < 4:
+                    break
+                size = struct.unpack("<I", header)[0]
+                data = f.read(size)
+                if len(data) < size:
+                    break
+                try:
+                    record = pickle.loads(zlib.decompress(data))
+                except zlib.error:
+                    break
+                valid_size = f.tell()
+
+                if snapshot is None:
+                    snapshot = dict(record)
+                    snapshot["webpages"] = states
+                    continue
+                for webpage_id, state in record["webpages"]:
+                    if webpage_id == len(states):
+                        states.append(state)
+                    else:
+                        states[webpage_id] = state
+                snapshot["cursor"] = record["cursor"]
+            f.truncate(valid_size)
+
+        if not states:
+            return None
+        self.num_saved_ = len(states)
+        return snapshot
+
+    def wait(self):
+        """
+        Wait for the end of the pending writes
+        """
+
+        if self.writer_:
+            self.records_.put(None)
+            self.writer_.join()
+            self.writer_ = None
+
+    def remove(self):
+        self.wait()
+        self.num_saved_ = None
+        try:
+            os.remove(self.path_)
+        except OSError:
+            pass
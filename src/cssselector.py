@@ -0,0 +1,344 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+
+class CSSCompound:
+    def __init__(self, tag, id_value, classes, attrs):
+        """
+        Initialise an instance of CSSCompound
+
+        Part of a CSS selector that applies to a single node, eg.: a[href^='/'] or div#main.container
+        tag    : name of the tag, None for any tag
+        id     : value of the id, None if not specified
+        classes: list of classes the node must have
+        attrs  : list of (name, operator, value) with operator in (None, =, ~=, |=, ^=, $=, *=)
+        """
+
+        self.tag = tag
+        self.id = id_value
+        self.classes = classes
+        self.attrs = attrs
+        self.match = self.compile_()
+
+    @staticmethod
+    def compile_attr_(name, operator, value):
+        """
+        Return a function testing the attributes of a node against [name operator value]
+        """
+
+        if not operator:
+            return lambda attrs: name in attrs
+
+        if operator == "=":
+            test = lambda attr: attr == value
+        elif operator == "~=": # contains the word
+            test = lambda attr: value in attr.split()
+        elif operator == "|=": # starts with value- or equals value
+            test = lambda attr: attr == value or attr.startswith(value + "-")
+        elif operator == "^=": # starts with
+            test = lambda attr: attr.startswith(value)
+        elif operator == "$=": # ends with
+            test = lambda attr: attr.endswith(value)
+        else: # *= contains
+            test = lambda attr: value in attr
+
+        def match(attrs):
+            try:
+                attr = attrs[name]
+            except KeyError:
+                return False
+            return attr is not None and test(attr)
+        return match
+
+    def compile_(self):
+        """
+        Return a function node -> True if the node fits this compound
+        Checks are ordered from the cheapest to the most expensive one
+        """
+
+        tests = list()
+        if self.id is not None:
+            tests.append(CSSCompound.compile_attr_("id", "=", self.id))
+        for class_name in self.classes:
+            tests.append(CSSCompound.compile_attr_("class", "~=", class_name))
+        for name, operator, value in self.attrs:
+            tests.append(CSSCompound.compile_attr_(name, operator, value))
+
+        tag = self.tag
+        if not tests:
+            if tag is None:
+                return lambda node: True
+            return lambda node: node.tag_ == tag
+
+        def match(node):
+            if tag is not None and node.tag_ != tag:
+                return False
+            attrs = node.attrs_
+            if attrs is None: # every test requires an attribute
+                return False
+            for test in tests:
+                if not test(attrs):
+                    return False
+            return True
+        return match
+
+class CSSQuery:
+    def __init__(self, compounds, combinators):
+        """
+        Initialise an instance of CSSQuery
+
+        Selector without union: compounds[0] combinators[1] compounds[1] ... combinators[n] compounds[n]
+        combinators[i] is the relation between compounds[i-1] and compounds[i]: ' ', '>', '+' or '~' (combinators[0] is None)
+
+        Nodes are matched from right to left: compounds[n] is tested on the node itself,
+        then its ancestors/previous siblings are checked against the remaining compounds
+        """
+
+        self.compounds = compounds
+        self.combinators = combinators
+        self.matches_ = [compound.match for compound in compounds]
+        self.last_ = len(compounds) -1
+        self.match_last_ = self.matches_[self.last_]
+
+    def match(self, node, scope=None):
+        """
+        Return True if node fits the query
+        scope: when specified, only scope and its descendants can be used to fit the query
+        """
+
+        if not self.match_last_(node):
+            return False
+        return self.last_ == 0 or self.match_left_(node, self.last_, scope)
+
+    def match_left_(self, node, position, scope):
+        """
+        node fits compounds[position], check compounds[0..position-1]
+        """
+
+        if position == 0:
+            return True
+
+        match = self.matches_[position -1]
+        combinator = self.combinators[position]
+        if combinator == " ":
+            while node is not scope:
+                node = node.parent_
+                if node is None:
+                    return False
+                if match(node) and self.match_left_(node, position -1, scope):
+                    return True
+            return False
+        elif combinator == ">":
+            if node is scope or node.parent_ is None:
+                return False
+            return match(node.parent_) and self.match_left_(node.parent_, position -1, scope)
+        elif combinator == "+":
+            if node is scope or node.previous_ is None:
+                return False
+            return match(node.previous_) and self.match_left_(node.previous_, position -1, scope)
+        else: # ~
+            if node is scope:
+                return False
+            node = node.previous_
+            while node is not None:
+                if match(node) and self.match_left_(node, position -1, scope):
+                    return True
+                node = node.previous_
+            return False
+
+class CSSSelector:
+    regex_combinator = re.compile(r'\s*([>+~])\s*|\s+')
+    regex_name = re.compile(r'[^\s\.\[\]#>+~,:\'"=]+')
+    regex_attr = re.compile(r'\[\s*([^\s\.\[\]#=\*~\|\^$\'"]+)\s*(?:([\*~\|\^$]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]*))\s*)?\]')
+    regex_separator = re.compile(r'\s*,\s*')
+
+    def __init__(self, css_selector):
+        """
+        Initialise an instance of CSSSelector by compiling css_selector
+        cf. CSS Selectors: http://www.w3schools.com/cssref/css_selectors.asp
+
+        CSS selectors which are not implemented:
+        + :......
+
+        eg.: head meta[description]
+        eg.: p.myclass
+        eg.: a[target=blank_]
+        eg.: h1 , h2
+        eg.: ul > li + li
+
+        Raise ValueError if css_selector cannot be parsed
+        """
+
+        self.css_selector = css_selector
+        self.queries = list()
+
+        position = 0
+        while True:
+            query, position = self.parse_query_(position)
+            if query:
+                self.queries.append(query)
+            if position >= len(css_selector):
+                break
+            m = CSSSelector.regex_separator.match(css_selector, position)
+            if not m:
+                raise ValueError("Invalid CSS selector: '%s' (position %d)" % (css_selector, position))
+            position = m.end()
+
+    def get_queries(self):
+        return self.queries
+
+    def match(self, node, scope=None):
+        for query in self.queries:
+            if query.match(node, scope):
+                return True
+        return False
+
+    def parse_query_(self, position):
+        """
+        Parse the selector starting at position until the next ',' or the end of the string
+        Return (CSSQuery or None if empty, position after the selector)
+        """
+
+        css_selector = self.css_selector
+        compounds = list()
+        combinators = list()
+        combinator = None
+
+        position = len(css_selector) - len(css_selector[position:].lstrip())
+        while position < len(css_selector) and css_selector[position] != ',':
+            if compounds and combinator is None:
+                m = CSSSelector.regex_combinator.match(css_selector, position)
+                if not m:
+                    raise ValueError("Invalid CSS selector: '%s' (position %d)" % (css_selector, position))
+                position = m.end()
+                if position >= len(css_selector) or css_selector[position] == ',':
+                    if m.group(1):
+                        raise ValueError("Invalid CSS selector: '%s' (missing element after '%s')" % (css_selector, m.group(1)))
+                    break
+                combinator = m.group(1) or " "
+                continue
+
+            compound, position = self.parse_compound_(position)
+            compounds.append(compound)
+            combinators.append(combinator)
+            combinator = None
+
+        if not compounds:
+            return (None, position)
+        return (CSSQuery(compounds, combinators), position)
+
+    def parse_compound_(self, position):
+        """
+        Parse the compound starting at position
+        Return (CSSCompound, position after the compound)
+        """
+
+        css_selector = self.css_selector
+        tag = None
+        id_value = None
+        classes = list()
+        attrs = list()
+
+        wildcard = css_selector[position] == "*"
+        if wildcard:
+            position += 1
+        else:
+            m = CSSSelector.regex_name.match(css_selector, position)
+            if m:
+                tag = m.group(0).lower()
+                position = m.end()
+
+        start = position
+        while position < len(css_selector):
+            c = css_selector[position]
+            if c == "#" or c == ".":
+                m = CSSSelector.regex_name.match(css_selector, position +1)
+                if not m:
+                    break
+                if c == "#":
+                    id_value = m.group(0)
+                else:
+                    classes.append(m.group(0))
+                position = m.end()
+            elif c == "[":
+                m = CSSSelector.regex_attr.match(css_selector, position)
+                if not m:
+                    break
+                if m.group(2):
+                    value = [v for v in m.group(3, 4, 5) if v is not None][0]
+                    attrs.append((m.group(1).lower(), m.group(2), value))
+                else:
+                    attrs.append((m.group(1).lower(), None, None))
+                position = m.end()
+            else:
+                break
+
+        if position == start and tag is None and not wildcard:
+            raise ValueError("Invalid CSS selector: '%s' (position %d)" % (css_selector, position))
+        return (CSSCompound(tag, id_value, classes, attrs), position)
+
+class SelectorCache:
+    def __init__(self, max_size=256):
+        """
+        Initialise an instance of SelectorCache
+
+        Compiled CSSSelector(s) keyed by their normalized CSS selector (cf. normalize)
+        At most max_size selectors are kept, least recently used ones are evicted first
+
+        CSSSelector(s) are never modified once compiled, so the cache can be shared by several threads
+        """
+
+        self.max_size_ = max(1, max_size)
+        self.selectors_ = OrderedDict() # from the least to the most recently used
+        self.lock_ = Lock()
+
+        self.num_hits_ = 0
+        self.num_misses_ = 0
+        self.num_evictions_ = 0
+
+    @staticmethod
+    def normalize(css_selector):
+        return css_selector.strip()
+
+    def get(self, css_selector):
+        """
+        Return the CSSSelector corresponding to css_selector
+        It is compiled if it is not in the cache yet
+        """
+
+        key = SelectorCache.normalize(css_selector)
+        with self.lock_:
+            try:
+                selector = self.selectors_.pop(key)
+            except KeyError:
+                self.num_misses_ += 1
+            else:
+                self.selectors_[key] = selector
+                self.num_hits_ += 1
+                return selector
+
+        # Compilation is carried out without the lock
+        # two threads may compile the same selector, the second result simply replaces the first one
+        selector = CSSSelector(key)
+        with self.lock_:
+            try:
+                del self.selectors_[key]
+            except KeyError:
+                pass
+            self.selectors_[key] = selector
+            while len(self.selectors_) > self.max_size_:
+                self.selectors_.popitem(False)
+                self.num_evictions_ += 1
+        return selector
+
+    def clear(self):
+        with self.lock_:
+            self.selectors_.clear()
+
+    def get_stats(self):
+        """
+        Return (number of hits, number of misses, number of evictions)
+        """
+
+        with self.lock_:
+            return (self.num_hits_, self.num_misses_, self.num_evictions_)
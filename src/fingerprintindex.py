@@ -0,0 +1,67 @@
+import struct
+from array import array
+from hashlib import md5
+
+class FingerprintIndex:
+    def __init__(self, get_value):
+        """
+        Initialise an instance of FingerprintIndex
+
+        FingerprintIndex groups the ids of the items having the same value (eg. digest of a title)
+        Only a 64-bit fingerprint of the values is kept: get_value(item_id) returns the value of an item already added
+        it is used to compare the values themselves when two fingerprints are identical
+
+        Entries of the index (fingerprint: entry):
+        + id of the item: only one item has this fingerprint
+        + list of groups (arrays of ids): items with identical values, several groups if different values collide
+        """
+
+        self.get_value_ = get_value
+        self.entries_ = dict()
+
+    @staticmethod
+    def fingerprint(value):
+        """
+        Return a 64-bit fingerprint of value
+        """
+
+        return struct.unpack("<q", md5(value).digest()[:8])[0]
+
+    def add(self, value, item_id):
+        """
+        Return the id of the first item added with the same value
+        None if there is no such item
+        """
+
+        fingerprint = FingerprintIndex.fingerprint(value)
+        try:
+            entry = self.entries_[fingerprint]
+        except KeyError:
+            self.entries_[fingerprint] = item_id
+            return None
+
+        if not isinstance(entry, list):
+            entry = [array('l', [entry])]
+            self.entries_[fingerprint] = entry
+
+        for group in entry:
+            if self.get_value_(group[0]) == value:
+                group.append(item_id)
+                return group[0]
+        entry.append(array('l', [item_id])) # same fingerprint for different values
+        return None
+
+    def get_groups(self):
+        """
+        Return the groups of at least two ids having the same value
+        ids are sorted in the order of add, groups by their first id
+        """
+
+        groups = list()
+        for entry in self.entries_.values():
+            if isinstance(entry, list):
+                for group in entry:
+                    if len(group) >= 2:
+                        groups.append(list(group))
+        groups.sort()
+        return groups
@@ -0,0 +1,202 @@
+import time
+from threading import Condition
+from urlparse import urlparse
+
+class HostState:
+    def __init__(self, rate, max_inflight):
+        """
+        Initialise an instance of HostState
+
+        Token bucket and number of queries in progress for a given host
+        rate: maximal number of queries per second (0 or less => no limit)
+        """
+
+        self.rate = rate
+        self.capacity = max(1., rate)
+        self.tokens = self.capacity
+        self.last_refill = time.time()
+
+        self.max_inflight = max_inflight
+        self.inflight = 0
+
+        # circuit breaker
+        self.failures = 0 # consecutive connection failures
+        self.opened_at = None
+
+    def set_rate(self, rate, capacity=None):
+        self.rate = rate
+        if capacity:
+            self.capacity = capacity
+        else:
+            self.capacity = max(1., rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def get_waiting_time(self, now):
+        """
+        Return the time to wait before being allowed to query the host
+        None if we have to wait for a query in progress to end
+        """
+
+        if self.inflight >= self.max_inflight:
+            return None
+        if self.rate <= 0 or self.tokens >= 1.:
+            return 0.
+        return (1. - self.tokens) / self.rate
+
+class HostScheduler:
+    def __init__(self, rate=0, max_inflight=2, breaker_threshold=3, breaker_cooldown=300.):
+        """
+        Initialise an instance of HostScheduler
+
+        HostScheduler enforces per-host limits on the queries carried out by the crawler:
+        + rate: maximal number of queries per second and per host (0 or less => no limit)
+        + max_inflight: maximal number of simultaneous queries per host
+
+        A worker waiting for a throttled host does not prevent other workers from querying other hosts
+
+        It also acts as a circuit breaker:
+        after breaker_threshold consecutive connection failures (0 => never), a host is considered unreachable
+        during breaker_cooldown seconds, then a new query is allowed to test it again
+        """
+
+        self.rate_ = rate
+        self.max_inflight_ = max_inflight
+        self.breaker_threshold_ = breaker_threshold
+        self.breaker_cooldown_ = breaker_cooldown
+        self.hosts_ = dict() # host: HostState
+        self.condition_ = Condition()
+
+    @staticmethod
+    def get_host(url):
+        return urlparse(url).netloc.lower()
+
+    def get_host_state(self, host):
+        """
+        Return the state of host
+        Create it if it was not defined before
+
+        Must be called with self.condition_ acquired
+        """
+
+        try:
+            return self.hosts_[host]
+        except KeyError:
+            state = HostState(self.rate_, self.max_inflight_)
+            self.hosts_[host] = state
+            return state
+
+    def set_crawl_delay(self, url, crawl_delay):
+        """
+        Apply the Crawl-delay of robots.txt to the host of url
+        The most restrictive value between crawl_delay and the default rate is kept
+        No burst is allowed once a Crawl-delay applies
+        """
+
+        if not crawl_delay or crawl_delay <= 0:
+            return
+
+        with self.condition_:
+            state = self.get_host_state(HostScheduler.get_host(url))
+            rate = 1. / crawl_delay
+            if state.rate <= 0 or rate < state.rate:
+                state.set_rate(rate, 1.)
+
+    def acquire(self, url):
+        """
+        Wait until the host of url can be queried
+        Each call must be followed by a call to release
+        """
+
+        host = HostScheduler.get_host(url)
+        with self.condition_:
+            state = self.get_host_state(host)
+            while True:
+                now = time.time()
+                state.refill(now)
+                waiting_time = state.get_waiting_time(now)
+                if waiting_time == 0.:
+                    break
+                self.condition_.wait(waiting_time)
+
+            if state.rate > 0:
+                state.tokens -= 1.
+            state.inflight += 1
+
+    def release(self, url):
+        host = HostScheduler.get_host(url)
+        with self.condition_:
+            self.hosts_[host].inflight -= 1
+            self.condition_.notify_all()
+
+    def is_open(self, url):
+        """
+        Return True if the circuit breaker of the host of url is open
+        ie. the host has to be considered unreachable without querying it
+        """
+
+        host = HostScheduler.get_host(url)
+        with self.condition_:
+            state = self.get_host_state(host)
+            if state.opened_at is None:
+                return False
+            if time.time() - state.opened_at < self.breaker_cooldown_:
+                return True
+            
+            # half-open: let a single query test the host
+            state.opened_at = time.time()
+            return False
+
+    def report_failure(self, url):
+        """
+        A query towards the host of url failed to connect
+        """
+
+        host = HostScheduler.get_host(url)
+        with self.condition_:
+            state = self.get_host_state(host)
+            state.failures += 1
+            if self.breaker_threshold_ and state.failures >= self.breaker_threshold_:
+                if state.opened_at is None:
+                    print "Circuit opened for host: %s" % host
+                state.opened_at = time.time()
+
+    def report_success(self, url):
+        """
+        A query towards the host of url got an answer
+        """
+
+        host = HostScheduler.get_host(url)
+        with self.condition_:
+            state = self.get_host_state(host)
+            state.failures = 0
+            state.opened_at = None
+
+    def interleave(self, webpages):
+        """
+        Return the positions of webpages ordered in a round-robin way between hosts
+        Consecutive fetches are then spread on several hosts
+        """
+
+        positions_per_host = dict()
+        hosts = list()
+        for pos in range(len(webpages)):
+            host = HostScheduler.get_host(webpages[pos].url)
+            try:
+                positions_per_host[host].append(pos)
+            except KeyError:
+                positions_per_host[host] = [pos]
+                hosts.append(host)
+
+        positions = list()
+        round_id = 0
+        while len(positions) < len(webpages):
+            for host in hosts:
+                if round_id < len(positions_per_host[host]):
+                    positions.append(positions_per_host[host][round_id])
+            round_id += 1
+        return positions
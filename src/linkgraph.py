@@ -0,0 +1,154 @@
+from array import array
+
+try:
+    import numpy
+except ImportError: # PageRank is computed in pure python without numpy
+    numpy = None
+
+class LinkGraph:
+    def __init__(self):
+        """
+        Initialise an instance of LinkGraph
+
+        LinkGraph stores the edges between webpages (identified by the ids given by WebSite.append)
+        in two arrays: edge i goes from sources_[i] to targets_[i]
+        The adjacency of a subgraph can then be built in CSR format (cf. get_csr) to analyse it
+        """
+
+        self.sources_ = array('i')
+        self.targets_ = array('i')
+        self.in_degrees_ = array('i') # number of edges towards each id
+
+    def add_edge(self, source, target):
+        self.sources_.append(source)
+        self.targets_.append(target)
+        if target >= len(self.in_degrees_):
+            self.in_degrees_.extend([0] * (target + 1 - len(self.in_degrees_)))
+        self.in_degrees_[target] += 1
+
+    def get_edges(self):
+        """
+        Return (sources, targets) arrays of the edges in the order of add_edge
+        """
+
+        return (self.sources_, self.targets_)
+
+    def get_in_degree(self, node):
+        if node >= len(self.in_degrees_):
+            return 0
+        return self.in_degrees_[node]
+
+    def get_csr(self, nodes):
+        """
+        Return (offsets, targets): adjacency of the subgraph made of nodes in CSR format
+        nodes[i] links to nodes[j] for every j in targets[offsets[i]:offsets[i+1]] (sorted, each j once)
+        """
+
+        positions = dict()
+        for i in range(len(nodes)):
+            positions[nodes[i]] = i
+
+        # edges of the subgraph, grouped by source (counting sort)
+        counts = [0] * (len(nodes) + 1)
+        edges = list()
+        for i in range(len(self.sources_)):
+            try:
+                edge = (positions[self.sources_[i]], positions[self.targets_[i]])
+            except KeyError:
+                continue
+            counts[edge[0] + 1] += 1
+            edges.append(edge)
+        for i in range(len(nodes)):
+            counts[i + 1] += counts[i]
+        grouped = array('i', [0] * len(edges))
+        cursors = counts[:-1]
+        for source, target in edges:
+            grouped[cursors[source]] = target
+            cursors[source] += 1
+
+        offsets = array('i', [0])
+        targets = array('i')
+        for i in range(len(nodes)):
+            targets.extend(sorted(set(grouped[counts[i]:counts[i+1]])))
+            offsets.append(len(targets))
+        return (offsets, targets)
+
+    @staticmethod
+    def get_in_degrees(offsets, targets):
+        """
+        Return the number of nodes linking to each node of a CSR adjacency
+        """
+
+        in_degrees = [0] * (len(offsets) - 1)
+        for target in targets:
+            in_degrees[target] += 1
+        return in_degrees
+
+    @staticmethod
+    def get_depths(offsets, targets, root):
+        """
+        Return the minimal number of edges from root to each node of a CSR adjacency (None if unreachable)
+        """
+
+        depths = [None] * (len(offsets) - 1)
+        depths[root] = 0
+        frontier = [root]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = list()
+            for node in frontier:
+                for target in targets[offsets[node]:offsets[node+1]]:
+                    if depths[target] is None:
+                        depths[target] = depth
+                        next_frontier.append(target)
+            frontier = next_frontier
+        return depths
+
+    @staticmethod
+    def get_pagerank(offsets, targets, damping=0.85, max_iterations=100, tolerance=1e-8):
+        """
+        Return the PageRank of each node of a CSR adjacency (sum of the values: 1)
+        the rank of nodes without outgoing edge is shared between all the nodes
+        """
+
+        num_nodes = len(offsets) - 1
+        if num_nodes == 0:
+            return list()
+
+        if numpy is not None:
+            offsets = numpy.array(offsets, dtype=numpy.int64)
+            targets = numpy.array(targets, dtype=numpy.int64)
+            out_degrees = numpy.diff(offsets)
+            sources = numpy.repeat(numpy.arange(num_nodes), out_degrees)
+            dangling = out_degrees == 0
+            ranks = numpy.ones(num_nodes) / num_nodes
+            for iteration in range(max_iterations):
+                shares = ranks / numpy.maximum(out_degrees, 1)
+                received = numpy.bincount(targets, weights=shares[sources], minlength=num_nodes)
+                new_ranks = (1. - damping) / num_nodes + damping * (received + ranks[dangling].sum() / num_nodes)
+                delta = numpy.abs(new_ranks - ranks).sum()
+                ranks = new_ranks
+                if delta < tolerance:
+                    break
+            return ranks.tolist()
+
+        ranks = [1. / num_nodes] * num_nodes
+        for iteration in range(max_iterations):
+            received = [0.] * num_nodes
+            dangling_rank = 0.
+            for node in range(num_nodes):
+                out_degree = offsets[node+1] - offsets[node]
+                if out_degree == 0:
+                    dangling_rank += ranks[node]
+                    continue
+                share = ranks[node] / out_degree
+                for target in targets[offsets[node]:offsets[node+1]]:
+                    received[target] += share
+            base = (1. - damping) / num_nodes + damping * dangling_rank / num_nodes
+            new_ranks = [base + damping * value for value in received]
+            delta = sum([abs(new_ranks[node] - ranks[node]) for node in range(num_nodes)])
+            ranks = new_ranks
+            if delta < tolerance:
+                break
+        return ranks
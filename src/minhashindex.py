@@ -0,0 +1,222 @@
+import re
+import zlib
+
+class MinHashIndex:
+    regex_word = re.compile(r'\w+', re.UNICODE)
+
+    # number of consecutive words hashed together
+    shingle_size = 3
+
+    # one permutation hashing: every shingle is hashed once on 32 bits, identically from one scan to another
+    # the low bits of the hash select one of the num_hashes values of the signature, which keeps the minimal hash it received
+    num_hashes = 32
+
+    def __init__(self, threshold=0.8, rows=4):
+        """
+        Initialise an instance of MinHashIndex
+
+        MinHashIndex groups items whose texts share at least threshold of their shingles (Jaccard similarity)
+        the similarity is estimated with the signatures of the texts (cf. signature)
+
+        Signatures are split into bands of rows values: items with an identical band are candidates
+        they are looked up in one bucket per band instead of being compared to every item of the index
+        texts sharing 80% of their shingles have an identical band in 98.5% of the cases (4 rows, 8 bands)
+        """
+
+        self.threshold_ = threshold
+        self.rows_ = rows
+        self.num_bands_ = MinHashIndex.num_hashes // rows
+
+        self.buckets_ = [dict() for i in range(self.num_bands_)] # band: signatures
+        self.items_ = dict() # signature: [(position in the order of add, item)]
+        self.num_items_ = 0
+
+    @staticmethod
+    def signature(text):
+        """
+        Return the MinHash signature of text: tuple of num_hashes integers
+        the proportion of identical values between two signatures estimates the Jaccard similarity of the shingles of the texts
+
+        None if text contains less than shingle_size words
+        """
+
+        builder = MinHashBuilder()
+        builder.feed(text)
+        return builder.get_signature()
+
+    @staticmethod
+    def similarity(signature1, signature2):
+        """
+        Return the estimated Jaccard similarity of two signatures
+        """
+
+        return sum([1 for i in range(len(signature1)) if signature1[i] == signature2[i]]) / float(len(signature1))
+
+    def add(self, signature, item):
+        try:
+            self.items_[signature].append((self.num_items_, item))
+        except KeyError:
+            self.items_[signature] = [(self.num_items_, item)]
+            for i in range(self.num_bands_):
+                band = signature[i*self.rows_:(i+1)*self.rows_]
+                try:
+                    self.buckets_[i][band].append(signature)
+                except KeyError:
+                    self.buckets_[i][band] = [signature]
+        self.num_items_ += 1
+
+    def get_near_signatures(self, signature):
+        """
+        Return the signatures of the index whose similarity with signature is at least threshold (itself included if indexed)
+        """
+
+        near = set()
+        seen = set()
+        for i in range(self.num_bands_):
+            try:
+                candidates = self.buckets_[i][signature[i*self.rows_:(i+1)*self.rows_]]
+            except KeyError:
+                continue
+            for candidate in candidates:
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if MinHashIndex.similarity(signature, candidate) >= self.threshold_:
+                    near.add(candidate)
+        return near
+
+    def get_clusters(self):
+        """
+        Return the groups of at least two items linked by similarities of at least threshold
+        Groups and their items are sorted in the order of add
+        """
+
+        # union-find over the distinct signatures
+        parents = dict()
+        for signature in self.items_:
+            parents[signature] = signature
+
+        def root(signature):
+            while parents[signature] != signature:
+                parents[signature] = parents[parents[signature]]
+                signature = parents[signature]
+            return signature
+
+        for signature in self.items_:
+            for near in self.get_near_signatures(signature):
+                root1 = root(signature)
+                root2 = root(near)
+                if root1 != root2:
+                    parents[root2] = root1
+
+        signatures_per_root = dict()
+        for signature in self.items_:
+            try:
+                signatures_per_root[root(signature)].append(signature)
+            except KeyError:
+                signatures_per_root[root(signature)] = [signature]
+
+        clusters = list()
+        for signatures in signatures_per_root.values():
+            if len(signatures) == 1 and len(self.items_[signatures[0]]) == 1:
+                continue
+            items = list()
+            for signature in signatures:
+                items += self.items_[signature]
+            items.sort()
+            clusters.append(items)
+
+        clusters.sort()
+        return [[item for position, item in items] for items in clusters]
+
+class MinHashBuilder:
+    def __init__(self):
+        """
+        Initialise an instance of MinHashBuilder
+
+        MinHashBuilder computes the MinHash signature of a text received by parts (cf. MinHashIndex.signature)
+        The text itself is not kept: only the hashes of its last words and the minimal hash of the shingles of each bin
+        Each word is hashed once, its shingles are then hashed by mixing 32-bit integers
+        """
+
+        self.hashes_ = list() # hashes of the last shingle_size -1 words
+        self.partial_ = u"" # last word of the text received so far, it can continue in the next part
+        self.bins_ = [None] * MinHashIndex.num_hashes # None => no shingle in the bin
+
+    def add_words_(self, bins, words):
+        """
+        Update bins with the shingles ending with each of words
+        """
+
+        hashes = self.hashes_
+        num_hashes = MinHashIndex.num_hashes
+        for word in words:
+            hashes.append(zlib.crc32(word.encode("utf-8")) & 0xffffffff)
+            if len(hashes) < MinHashIndex.shingle_size:
+                continue
+
+            shingle = 0
+            for word_hash in hashes:
+                shingle = ((shingle * 0x01000193) ^ word_hash) & 0xffffffff
+            del hashes[0]
+
+            # finalizer of MurmurHash3: every bit depends on every word of the shingle
+            shingle ^= shingle >> 16
+            shingle = (shingle * 0x85ebca6b) & 0xffffffff
+            shingle ^= shingle >> 13
+            shingle = (shingle * 0xc2b2ae35) & 0xffffffff
+            shingle ^= shingle >> 16
+
+            position = shingle % num_hashes
+            if bins[position] is None or shingle < bins[position]:
+                bins[position] = shingle
+
+    def feed(self, text):
+        """
+        Append text to the text received so far
+        """
+
+        text = self.partial_ + text.lower()
+        words = MinHashIndex.regex_word.findall(text)
+        self.partial_ = u""
+        if words and MinHashIndex.regex_word.match(text[-1]):
+            self.partial_ = words.pop()
+        self.add_words_(self.bins_, words)
+
+    def get_bins_(self):
+        bins = list(self.bins_)
+        if self.partial_:
+            hashes = list(self.hashes_)
+            self.add_words_(bins, [self.partial_])
+            self.hashes_ = hashes
+        return bins
+
+    def get_signature(self, other=None):
+        """
+        Return the signature of the text received so far (cf. MinHashIndex.signature)
+
+        other: if not None, MinHashBuilder of another text
+        the signature is then the one of the union of the shingles of both texts
+        """
+
+        bins = self.get_bins_()
+        if other is not None:
+            other_bins = other.get_bins_()
+            for i in range(len(bins)):
+                if bins[i] is None or (other_bins[i] is not None and other_bins[i] < bins[i]):
+                    bins[i] = other_bins[i]
+
+        filled = [i for i in range(len(bins)) if bins[i] is not None]
+        if not filled:
+            return None
+
+        # densification: an empty bin takes the value of the next filled one (circularly)
+        # so that short texts are compared on every value of their signatures
+        signature = list()
+        next_filled = filled[0] + len(bins)
+        for i in reversed(range(len(bins))):
+            if bins[i] is not None:
+                next_filled = i
+            signature.append(bins[next_filled % len(bins)])
+        signature.reverse()
+        return tuple(signature)
@@ -10,6 +10,16 @@ class OutputPrinter:
     def render(self, webpages, failed_tests, passed_tests):
         pass
 
+    @staticmethod
+    def get_ranked_webpages(webpages):
+        """
+        Return the webpages analysed by WebSite.analyse_links sorted by decreasing PageRank
+        """
+
+        ranked = [wp for wp in webpages if wp.pagerank is not None and wp.click_depth is not None]
+        ranked.sort(key=lambda wp: (-wp.pagerank, wp.id))
+        return ranked
+
 class StandardPrinter(OutputPrinter):
     def __init__(self, color=False):
         OutputPrinter.__init__(self)
@@ -31,6 +41,10 @@ class StandardPrinter(OutputPrinter):
                 print "[\033[91m%d\033[0m] %s - %s - %s" % (wp.status, wp.url, wp.get_formatted_length(), content_type)
             else:
                 print "[%d] %s - %s - %s" % (wp.status, wp.url, wp.get_formatted_length(), content_type)
+
+        print "\nINTERNAL LINKS (PageRank - inlinks - clicks):\n"
+        for wp in OutputPrinter.get_ranked_webpages(webpages):
+            print "%.4f - %d - %d - %s" % (wp.pagerank, wp.num_inlinks, wp.click_depth, wp.url)
         
         print "\nFAILED TESTS:\n"
         for test in failed_tests:
@@ -47,8 +61,14 @@ class StandardPrinter(OutputPrinter):
                 print "Severity: \033[92m", test.get_level_str(), "\033[0m"
             print "Details:  ", test.get_description()
             print ""
-            for wp in test.get_failures():
-                print "+ ", wp.url
+            if test.get_groups():
+                for i in range(len(test.get_groups())):
+                    print "+  Group #%d" % (i+1)
+                    for wp in test.get_groups()[i]:
+                        print "   + ", wp.url
+            else:
+                for wp in test.get_failures():
+                    print "+ ", wp.url
 
         print "\nPASSED TESTS:"
         for test in passed_tests:
@@ -98,14 +118,33 @@ class PDFPrinter(OutputPrinter):
             f.write('</ul>')
             f.write('</div>')
 
+            f.write('<div class="page">')
+            f.write('<h2>Internal links:</h2><ul>')
+            for wp in OutputPrinter.get_ranked_webpages(webpages):
+                f.write('<li><p>%s</p>' % cgi.escape(wp.url))
+                f.write('<p class="details">')
+                f.write('<span class="pagerank">PageRank: <span data-value="%.4f">%.4f</span></span>' % (wp.pagerank, wp.pagerank))
+                f.write('<span class="inlinks">Inlinks: <span data-value="%d">%d</span></span>' % (wp.num_inlinks, wp.num_inlinks))
+                f.write('<span class="clicks">#clicks: <span data-value="%d">%d</span></span>' % (wp.click_depth, wp.click_depth))
+                f.write('</p></li>')
+            f.write('</ul>')
+            f.write('</div>')
+
             f.write('<div class="page">')
             f.write('<h2>Improvements:</h2>')
             for test in failed_tests:
                 f.write('<h3><span class="severity">[<span class="level%d">%s</span>]</span> %s</h3>' % (test.get_level(), cgi.escape(test.get_level_str()), cgi.escape(test.get_title())))
                 f.write('<p class="description">%s</p>' % cgi.escape(test.get_description()))
                 f.write('<ul>')
-                for wp in test.get_failures():
-                    f.write('<li>%s</li>' % cgi.escape(wp.url))
+                if test.get_groups():
+                    for i in range(len(test.get_groups())):
+                        f.write('<li>Group #%d<ul>' % (i+1))
+                        for wp in test.get_groups()[i]:
+                            f.write('<li>%s</li>' % cgi.escape(wp.url))
+                        f.write('</ul></li>')
+                else:
+                    for wp in test.get_failures():
+                        f.write('<li>%s</li>' % cgi.escape(wp.url))
                 f.write('</ul>')
             f.write('</div>')
             
@@ -39,13 +39,72 @@ DESCRIPTION
 
     -n, --retry=[num-retry]
         Specify the number of times to retry queries before failing.
+        Tries are separated by an exponential backoff (with jitter). Retry-After is honored for 429 and 503 answers.
 
     -c, --color
         Colored output. Default: no-colors.
+
+    -w [workers], --workers=[workers]
+        Number of pages fetched in parallel. Pages of a same depth are fetched concurrently, the report stays identical. By default: workers=1.
+
+    -v [verify-workers], --verify-workers=[verify-workers]
+        Number of external webpages and ressources checked in parallel. They are checked after the crawl of internal webpages. By default: verify-workers=16.
+
+    -p [pool-size], --pool-size=[pool-size]
+        Maximal number of keep-alive connections per host. By default: pool-size=10.
+
+    -s, --single-request
+        One streaming GET query per webpage instead of a HEAD query followed by a GET query. The content is only downloaded for HTML webpages.
+        Not applied to deep analysis.
+
+    --max-page-size=[max-page-size]
+        Maximal number of ko downloaded per webpage. Larger webpages are truncated.
+        0 disables the limit: webpages are downloaded entirely. By default: max-page-size=10240.
+
+    -r [host-rate], --host-rate=[host-rate]
+        Maximal number of queries per second towards a same host. By default: host-rate=0 (no limit).
+        The Crawl-delay of robots.txt is respected whatever this value.
+
+    -i [host-inflight], --host-inflight=[host-inflight]
+        Maximal number of simultaneous queries towards a same host. By default: host-inflight=2.
+
+    --breaker-threshold=[failures]
+        Number of consecutive connection failures after which a host is considered unreachable: its remaining webpages are not queried.
+        By default: breaker-threshold=3.
+
+    --cache=[directory]
+        Keep the validators (ETag, Last-Modified) and the analysis of the webpages in directory.
+        Later scans send conditional queries and re-use the stored analysis of unchanged webpages (304 answer or same source code).
+
+    --cache-size=[cache-size]
+        Maximal size of the cache in Mo. By default: cache-size=100.
+
+    --processes=[processes]
+        Number of processes parsing and analysing the source code of the webpages. By default: processes=1 (no additional process).
+        Parsing is CPU-bound: use it to take advantage of several cores on large websites.
+
+    --parser=[python|lxml]
+        Parser reading the source code of the webpages. By default: parser=python.
+        lxml is faster but requires the lxml module, the python parser is used if it is not installed.
+
+    --checks=[file]
+        JSON file describing the SEO checks applied to every webpage. By default: ./src/seochecks.json.
+
+    --checkpoint=[file]
+        File where the state of the crawl is saved periodically. By default: ./output/checkpoint.
+        It is removed at the end of the crawl.
+
+    --checkpoint-interval=[seconds]
+        Minimal time between two checkpoints. 0 disables checkpointing: the crawl cannot be resumed.
+        By default: checkpoint-interval=60.
+
+    --resume
+        Continue the crawl saved in the checkpoint file, without querying already scanned pages again.
+        The crawl keeps the options it has been started with (max-depth, nofollow, noindex, deep, retry, single-request, parser, checks).
 """
 
 try:
-    opts, args = getopt.getopt(sys.argv[1:], "d:u:m:n:hca", ["max-depth=", "retry=", "url=", "help", "nofollow", "noindex", "email=", "color", "deep"])
+    opts, args = getopt.getopt(sys.argv[1:], "d:u:m:n:w:v:p:r:i:hcas", ["max-depth=", "retry=", "url=", "help", "nofollow", "noindex", "email=", "color", "deep", "workers=", "verify-workers=", "pool-size=", "max-page-size=", "single-request", "host-rate=", "host-inflight=", "breaker-threshold=", "cache=", "cache-size=", "processes=", "parser=", "checks=", "checkpoint=", "checkpoint-interval=", "resume"])
 except getopt.GetoptError as err:
     print help_content
     print(str(err))
@@ -80,6 +139,8 @@ for opt, arg in opts:
         parameters["color"] = True
     elif opt in ("-a", "--deep"):
         parameters["deep"] = True
+    elif opt in ("-s", "--single-request"):
+        parameters["single-request"] = True
     elif opt in ("-n", "--retry"):
         try:
             parameters["num-retry"] = int(arg)
@@ -91,6 +152,150 @@ for opt, arg in opts:
             print "INVALID PARAMETER for retry: MUST BE an INTEGER\n"
             print help_content
             sys.exit(1)
+    elif opt in ("-w", "--workers"):
+        try:
+            parameters["workers"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for workers: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for workers: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("-v", "--verify-workers"):
+        try:
+            parameters["verify-workers"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for verify-workers: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for verify-workers: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("-p", "--pool-size"):
+        try:
+            parameters["pool-size"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for pool-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for pool-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--max-page-size",):
+        try:
+            parameters["max-page-size"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for max-page-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for max-page-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        if parameters["max-page-size"] < 0: # 0 disables the limit
+            print "INVALID PARAMETER for max-page-size: MUST BE a POSITIVE INTEGER or 0\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("-r", "--host-rate"):
+        try:
+            parameters["host-rate"] = float(arg)
+        except ValueError:
+            print "INVALID PARAMETER for host-rate: MUST BE a NUMBER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for host-rate: MUST BE a NUMBER\n"
+            print help_content
+            sys.exit(1)
+        if parameters["host-rate"] < 0: # 0 disables the limit
+            print "INVALID PARAMETER for host-rate: MUST BE a POSITIVE NUMBER or 0\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("-i", "--host-inflight"):
+        try:
+            parameters["host-inflight"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for host-inflight: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for host-inflight: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        if parameters["host-inflight"] < 1: # no query could ever be carried out
+            print "INVALID PARAMETER for host-inflight: MUST BE a POSITIVE INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--breaker-threshold",):
+        try:
+            parameters["breaker-threshold"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for breaker-threshold: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for breaker-threshold: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        if parameters["breaker-threshold"] < 1: # the circuit would open on the first failure
+            print "INVALID PARAMETER for breaker-threshold: MUST BE a POSITIVE INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--cache",):
+        parameters["cache"] = arg
+    elif opt in ("--cache-size",):
+        try:
+            parameters["cache-size"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for cache-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for cache-size: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--processes",):
+        try:
+            parameters["processes"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for processes: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for processes: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--parser",):
+        if arg not in ("python", "lxml"):
+            print "INVALID PARAMETER for parser: MUST BE python or lxml\n"
+            print help_content
+            sys.exit(1)
+        parameters["parser"] = arg
+    elif opt in ("--checks",):
+        parameters["checks"] = arg
+    elif opt in ("--checkpoint",):
+        parameters["checkpoint"] = arg
+    elif opt in ("--checkpoint-interval",):
+        try:
+            parameters["checkpoint-interval"] = int(arg)
+        except ValueError:
+            print "INVALID PARAMETER for checkpoint-interval: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        except TypeError:
+            print "INVALID PARAMETER for checkpoint-interval: MUST BE an INTEGER\n"
+            print help_content
+            sys.exit(1)
+        if parameters["checkpoint-interval"] < 0: # 0 disables checkpoints
+            print "INVALID PARAMETER for checkpoint-interval: MUST BE a POSITIVE INTEGER or 0\n"
+            print help_content
+            sys.exit(1)
+    elif opt in ("--resume",):
+        parameters["resume"] = True
 
 if not url:
     print "MISSING PARAMETER: url\n"
@@ -1,6 +1,11 @@
 import re
 from abc import abstractmethod, ABCMeta
 
+try:
+    import numpy
+except ImportError: # columnar evaluation is optional (cf. SEOCheckColumns)
+    numpy = None
+
 class SEOCheck:
     __metaclass__ = ABCMeta
 
@@ -17,6 +22,10 @@ class SEOCheck:
 
         self.title_ = title
         self.description_ = description
+
+        # position of the measured values in webpage_check_dict (cf. SEOCheckManager.append)
+        self.slot_ = None
+        self.slot_raw_ = False
     
     def get_css_selector(self):
         return self.css_selector_
@@ -30,16 +39,57 @@ class SEOCheck:
     def get_description(self):
         return self.description_
 
+    def get_slot(self):
+        return self.slot_
+
+    def is_slot_raw(self):
+        return self.slot_raw_
+
+    def set_slot(self, slot, raw):
+        """
+        Read the measured values in webpage_check_dict[slot]
+        raw: the slot contains the values themselves instead of their lengths
+        """
+
+        self.slot_ = slot
+        self.slot_raw_ = raw
+
+    def requires_raw_values(self):
+        """
+        Return True if check_unitary needs the values themselves and not only their lengths
+        """
+
+        return False
+
+    def get_length_(self, webpage_check_dict_elt):
+        if self.slot_raw_ and webpage_check_dict_elt:
+            return len(webpage_check_dict_elt)
+        return webpage_check_dict_elt
+
     @abstractmethod
     def check_unitary(self, webpage_check_dict_elt):
         pass
 
     def check(self, webpage_check_dict):
-        for elt in webpage_check_dict[self.css_selector_][self.attr_name_]:
+        for elt in webpage_check_dict[self.slot_]:
             if not self.check_unitary(elt):
                 return False
         return True
 
+    # Subclasses can also define check_column(lengths, offsets), vectorized version of check for several webpages at once (cf. SEOCheckColumns)
+    # lengths: numpy array of the lengths measured on every webpage (0 for None), even for raw slots
+    # offsets: numpy array, lengths[offsets[i]:offsets[i+1]] have been measured on the i-th webpage
+    # it returns a numpy array of booleans: True for the webpages failing the check
+
+    @staticmethod
+    def count_per_webpage(mask, offsets):
+        """
+        Return the number of True values of mask for each webpage
+        """
+
+        cumulated = numpy.concatenate(([0], numpy.cumsum(mask)))
+        return cumulated[offsets[1:]] - cumulated[offsets[:-1]]
+
 class SEOCheckExist(SEOCheck):
     """
     Check value = True
@@ -49,17 +99,20 @@ class SEOCheckExist(SEOCheck):
     """
     
     def check_unitary(self, webpage_check_dict_elt):
-        if webpage_check_dict_elt[0]: # != None
+        if webpage_check_dict_elt: # != None
             return True
         else:
             return False
     
     def check(self, webpage_check_dict):
-        if len(webpage_check_dict[self.css_selector_][self.attr_name_]) == 0:
+        if len(webpage_check_dict[self.slot_]) == 0:
             return False
 
         return SEOCheck.check(self, webpage_check_dict)
 
+    def check_column(self, lengths, offsets):
+        return (numpy.diff(offsets) == 0) | (SEOCheck.count_per_webpage(lengths == 0, offsets) > 0)
+
 class SEOCheckNotExist(SEOCheck):
     """
     Check value = True
@@ -76,15 +129,17 @@ class SEOCheckNotExist(SEOCheck):
         else:
             self.regex_specific_value_ = None
 
+    def requires_raw_values(self):
+        return self.regex_specific_value_ is not None
+
     def check_unitary(self, webpage_check_dict_elt):
         if self.regex_specific_value_:
-            if not webpage_check_dict_elt[0]: # attr not defined
+            if not webpage_check_dict_elt: # attr not defined
                 return False
-            #print self.css_selector_, " - ", self.attr_name_, " - ", webpage_check_dict_elt[1], " - ", type(webpage_check_dict_elt[1])
-            if len(self.regex_specific_value_.findall(webpage_check_dict_elt[1])) == 0: # attr != specific_value
+            if len(self.regex_specific_value_.findall(webpage_check_dict_elt)) == 0: # attr != specific_value
                 return False
         else:
-            if webpage_check_dict_elt[0]: # attr defined
+            if webpage_check_dict_elt: # attr defined
                 return False
         return True
     
@@ -95,6 +150,7 @@ class SEOCheckLength(SEOCheck):
         operator = '<': for all entries that fit css_selector: attr NULL or len(attr) >= length
         operator = '>': for all entries that fit css_selector: attr NULL or len(attr) <= length
     """
+
     def __init__(self, css_selector, attr_name, operator, length, label=None, description=None):
         # operator <: PB if measured <length
         # operator >: PB if measured >length
@@ -104,17 +160,28 @@ class SEOCheckLength(SEOCheck):
         self.operator_ = operator
 
     def check_unitary(self, webpage_check_dict_elt):
-        if webpage_check_dict_elt[0] and ((self.operator_ == "<" and webpage_check_dict_elt[0] < self.length_) or (self.operator_ == ">" and webpage_check_dict_elt[0] > self.length_)):
+        length = self.get_length_(webpage_check_dict_elt)
+        if length and ((self.operator_ == "<" and length < self.length_) or (self.operator_ == ">" and length > self.length_)):
             return False
         else:
             return True # not set => True, None is considered OK
 
+    def check_column(self, lengths, offsets):
+        if self.operator_ == "<":
+            mask = (lengths != 0) & (lengths < self.length_)
+        elif self.operator_ == ">":
+            mask = (lengths != 0) & (lengths > self.length_)
+        else:
+            mask = numpy.zeros(len(lengths), dtype=bool)
+        return SEOCheck.count_per_webpage(mask, offsets) > 0
+
 class SEOCheckLengthBetween(SEOCheck):
     """
     Check value = True
     iff.
         for all entries that fit css_selector: attr NULL or length_min <= len(attr) <= length_max
     """
+
     def __init__(self, css_selector, attr_name, length_min, length_max, label=None, description=None):
         # PB if measured <length_min or measured >length_max
         # OK if measured in [length_min ; length_max]
@@ -124,8 +191,12 @@ class SEOCheckLengthBetween(SEOCheck):
         self.length_max_ = length_max
 
     def check_unitary(self, webpage_check_dict_elt):
-        if webpage_check_dict_elt[0] and (webpage_check_dict_elt[0] < self.length_min_ or webpage_check_dict_elt[0] > self.length_max_):
+        length = self.get_length_(webpage_check_dict_elt)
+        if length and (length < self.length_min_ or length > self.length_max_):
             return False
         else:
             return True # not set => True, None is considered OK
 
+    def check_column(self, lengths, offsets):
+        mask = (lengths != 0) & ((lengths < self.length_min_) | (lengths > self.length_max_))
+        return SEOCheck.count_per_webpage(mask, offsets) > 0
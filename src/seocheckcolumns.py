@@ -0,0 +1,62 @@
+try:
+    import numpy
+except ImportError: # columnar evaluation is optional
+    numpy = None
+
+class SEOCheckColumns:
+    def __init__(self, webpages):
+        """
+        Initialise an instance of SEOCheckColumns
+
+        SEOCheckColumns stores the lengths measured on webpages column-wise:
+        one array per slot of webpage_check_dict containing the lengths of all the webpages
+        (webpage_check_dict are read once per slot whatever the number of checks using it)
+
+        Checks implementing check_column are then evaluated for all the webpages at once
+        webpages: webpages to check, they must have a webpage_check_dict
+        """
+
+        self.webpages_ = webpages
+        self.columns_ = dict()
+
+    @staticmethod
+    def is_available():
+        return numpy is not None
+
+    def get_column(self, slot, raw):
+        """
+        Return (lengths, offsets) for the slot of webpage_check_dict (cf. SEOCheckManager)
+        lengths[offsets[i]:offsets[i+1]] are the lengths measured on the i-th webpage, None being stored as 0
+        raw: the slot contains the values themselves instead of their lengths
+        """
+
+        try:
+            return self.columns_[slot]
+        except KeyError:
+            pass
+
+        measures = [webpage.get_check_dict()[slot] for webpage in self.webpages_]
+        if raw:
+            lengths = [len(elt) if elt else 0 for elts in measures for elt in elts]
+        else:
+            lengths = [elt or 0 for elts in measures for elt in elts]
+        lengths = numpy.array(lengths, dtype=numpy.int64)
+        offsets = numpy.zeros(len(measures) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(elts) for elts in measures], out=offsets[1:])
+
+        column = (lengths, offsets)
+        self.columns_[slot] = column
+        return column
+
+    def get_failing_webpages(self, check):
+        """
+        Return the webpages failing check, in the order of webpages
+        None if check cannot be evaluated column-wise
+        """
+
+        if not hasattr(check, "check_column"):
+            return None
+
+        lengths, offsets = self.get_column(check.get_slot(), check.is_slot_raw())
+        failures = check.check_column(lengths, offsets)
+        return [self.webpages_[i] for i in numpy.flatnonzero(failures)]
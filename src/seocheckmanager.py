@@ -1,90 +1,166 @@
-from seocheck import SEOCheck, SEOCheckNotExist
+import json
+from hashlib import sha1
+from seocheck import SEOCheck, SEOCheckExist, SEOCheckNotExist, SEOCheckLength, SEOCheckLengthBetween
 
 class SEOCheckManager:
     def __init__(self):
         self.check_list_ = list()
-        self.selectors_attrs_ = dict()
+
+        # execution plan: one slot (css_selector, attr, raw) per couple (css_selector, attr) used by the checks
+        # webpage_check_dict[slot] contains the values (raw) or the lengths of attr for the nodes matching css_selector
+        self.plan_ = list()
+        self.slots_ = dict()
+        self.css_selectors_ = list()
 
     def append(self, seocheck, level=2):
         """
         Append SEOCheck object to the manager
+        seocheck reads its slot of webpage_check_dict, it can only be appended to one manager
         """
 
         self.check_list_.append((seocheck, level))
 
+        css_selector = seocheck.get_css_selector()
+        attr = seocheck.get_attr_name()
+        try:
+            slot = self.slots_[(css_selector, attr)]
+        except KeyError:
+            slot = len(self.plan_)
+            self.slots_[(css_selector, attr)] = slot
+            self.plan_.append((css_selector, attr, False))
+            if css_selector not in self.css_selectors_:
+                self.css_selectors_.append(css_selector)
+
+        # raw values are also enough for the checks working on lengths
+        if seocheck.requires_raw_values() and not self.plan_[slot][2]:
+            self.plan_[slot] = (css_selector, attr, True)
+            for check_and_level in self.check_list_:
+                if check_and_level[0].get_slot() == slot:
+                    check_and_level[0].set_slot(slot, True)
+        seocheck.set_slot(slot, self.plan_[slot][2])
+
+    def load(self, path, variables=None):
+        """
+        Append the checks described in the JSON file path
+
+        The file contains a list of checks, eg.:
+        [{"type": "exist", "selector": "html > head > title", "title": "Missing <TITLE/>", "level": 0},
+         {"type": "length", "selector": "img", "attr": "alt", "operator": ">", "length": 80, "title": "Too long ALT attribute for <IMG/>"}]
+
+        type: exist, not-exist (pattern), length (operator, length) or length-between (min, max)
+        attr: attribute to check, data of the node if not specified
+        description: optional, level: 2 by default
+        variables: {name: value}, {name} is replaced by value in the selectors
+        """
+
+        with open(path, "r") as f:
+            try:
+                descriptions = json.load(f)
+            except ValueError as e:
+                raise ValueError("'%s' is not a valid JSON file: %s" % (path, e))
+
+        for i in range(len(descriptions)):
+            try:
+                check, level = SEOCheckManager.create_check_(descriptions[i], variables)
+            except KeyError as e:
+                raise ValueError("check #%d of '%s': missing %s" % (i, path, e))
+            except ValueError as e:
+                raise ValueError("check #%d of '%s': %s" % (i, path, e))
+            self.append(check, level)
+
+    @staticmethod
+    def get_value_(description, key, default=None):
+        """
+        Return description[key] (str instead of unicode)
+        KeyError if it is not specified and there is no default value
+        """
+
         try:
-            self.selectors_attrs_[seocheck.get_css_selector()]
+            value = description[key]
         except KeyError:
-            self.selectors_attrs_[seocheck.get_css_selector()] = list()
+            if default is None:
+                raise
+            return default
+        if isinstance(value, unicode):
+            return value.encode("utf-8")
+        return value
+
+    @staticmethod
+    def create_check_(description, variables):
+        """
+        Return (check, level) for the description of a check (cf. load)
+        """
+
+        css_selector = SEOCheckManager.get_value_(description, "selector")
+        if variables:
+            for name, value in variables.items():
+                css_selector = css_selector.replace("{%s}" % name, value)
+        attr = SEOCheckManager.get_value_(description, "attr", False) or None
+        title = SEOCheckManager.get_value_(description, "title")
+        text = SEOCheckManager.get_value_(description, "description", False) or None
+
+        check_type = SEOCheckManager.get_value_(description, "type")
+        if check_type == "exist":
+            check = SEOCheckExist(css_selector, attr, title, text)
+        elif check_type == "not-exist":
+            pattern = SEOCheckManager.get_value_(description, "pattern", False) or None
+            check = SEOCheckNotExist(css_selector, attr, pattern, title, text)
+        elif check_type == "length":
+            operator = SEOCheckManager.get_value_(description, "operator")
+            check = SEOCheckLength(css_selector, attr, operator, description["length"], title, text)
+        elif check_type == "length-between":
+            check = SEOCheckLengthBetween(css_selector, attr, description["min"], description["max"], title, text)
+        else:
+            raise ValueError("unknown type of check: %s" % check_type)
+
+        return (check, SEOCheckManager.get_value_(description, "level", 2))
 
-        if seocheck.get_attr_name() not in self.selectors_attrs_[seocheck.get_css_selector()]:
-            self.selectors_attrs_[seocheck.get_css_selector()].append(seocheck.get_attr_name())
-    
     def get_check_list(self):
         return self.check_list_
 
-    def get_selectors_attrs(self):
-        return self.selectors_attrs_
+    def get_plan(self):
+        return self.plan_
 
-    def generate_webpage_check_dict(self, webpageparser):
+    def get_signature(self):
         """
-        Return webpage_check_dict
+        Return a digest identifying the content of the webpage_check_dict generated by this manager
+        webpage_check_dict generated by managers with different signatures are not compatible
         """
+
+        return sha1(repr(self.plan_)).hexdigest()
+
+    def get_css_selectors(self):
+        return self.css_selectors_
+
+    def generate_webpage_check_dict(self, webpageparser, nodes_per_selector=None):
+        """
+        Return webpage_check_dict: for each slot of the plan, the list of the values or lengths measured (None if not defined)
+
+        nodes_per_selector: result of webpageparser.find_many for (at least) the selectors of get_css_selectors
+        if not specified, it is computed by a call to webpageparser.find_many
+        """
+        
+        if nodes_per_selector is None:
+            nodes_per_selector = webpageparser.find_many(self.get_css_selectors())
         
-        webpage_check_dict = dict()
-        for css_selector, attrs in self.selectors_attrs_.items():
-            webpage_check_dict[css_selector] = dict()
-            corresponding_nodes = webpageparser.find(css_selector)
-            for attr in attrs:
-                measured_lengths = list()
+        webpage_check_dict = list()
+        for css_selector, attr, raw in self.plan_:
+            values = list()
+            for node in nodes_per_selector[css_selector]:
                 if attr: # != None
-                    for node in corresponding_nodes:
-                        node_attrs = node.get_attrs()
-                        try:
-                            node_attr = node_attrs[attr]
-                        except KeyError:
-                            node_attr = None
-                        
-                        if node_attr:
-                            measured_lengths.append(tuple([len(node_attr)]))
-                        else:
-                            measured_lengths.append(tuple([None]))
+                    try:
+                        value = node.get_attrs()[attr]
+                    except KeyError:
+                        value = None
                 else:
-                    for node in corresponding_nodes:
-                        if node.get_data():
-                            measured_lengths.append(tuple([len(node.get_data())]))
-                        else:
-                            measured_lengths.append(tuple([None]))
-                
-                webpage_check_dict[css_selector][attr] = measured_lengths
-        
-        # SEOCheckNotExist is a special case, it requires the value of the field itself
-        # iff regex_specific_value_
-        for check_and_level in self.check_list_:
-            check = check_and_level[0]
-            if isinstance(check, SEOCheckNotExist) and check.regex_specific_value_:
-                css_selector = check.get_css_selector()
-                attr = check.get_attr_name()
-                
-                corresponding_nodes = webpageparser.find(css_selector)
-                values = list()
-                if attr:
-                    for node in corresponding_nodes:
-                        node_attrs = node.get_attrs()
-                        try:
-                            node_attr = node_attrs[attr]
-                        except KeyError:
-                            node_attr = None
-                        values.append(node_attr)
+                    value = node.get_data()
+
+                if not value:
+                    values.append(None)
+                elif raw:
+                    values.append(value)
                 else:
-                    for node in corresponding_nodes:
-                        if node.get_data():
-                            values.append(node.get_data())
-                        else:
-                            values.append(None)
-                
-                measured_lengths = webpage_check_dict[css_selector][attr]
-                webpage_check_dict[css_selector][attr] = [(measured_lengths[i][0], values[i]) for i in range(len(values))]
+                    values.append(len(value))
+            webpage_check_dict.append(values)
 
         return webpage_check_dict
-
@@ -0,0 +1,75 @@
+import requests
+from threading import Lock
+from urlparse import urlparse
+
+class SessionPool:
+    def __init__(self, pool_size=10):
+        """
+        Initialise an instance of SessionPool
+
+        Every query of the crawler goes through a SessionPool
+        in order to re-use keep-alive connections (and TLS handshakes) between queries towards the same host
+
+        pool_size: maximal number of connections kept alive per host
+        """
+
+        self.pool_size_ = pool_size
+        self.sessions_ = dict() # scheme://host: requests.Session
+        self.lock_ = Lock()
+
+    def get_session(self, url):
+        """
+        Return the session in charge of the host of url
+        Create it if it was not defined before
+        """
+
+        parsed_url = urlparse(url)
+        host = "%s://%s" % (parsed_url.scheme, parsed_url.netloc)
+
+        with self.lock_:
+            try:
+                return self.sessions_[host]
+            except KeyError:
+                pass
+
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.pool_size_)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self.sessions_[host] = session
+            return session
+
+    def get(self, url, **kwargs):
+        return self.get_session(url).get(url, **kwargs)
+
+    def head(self, url, **kwargs):
+        return self.get_session(url).head(url, **kwargs)
+
+    def get_stats(self):
+        """
+        Return (number of queries, number of connections opened, number of connections re-used)
+        """
+
+        num_requests = 0
+        num_connections = 0
+        with self.lock_:
+            sessions = self.sessions_.values()
+        for session in sessions:
+            # http:// and https:// share the same adapter
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    try:
+                        pool = pools[key]
+                    except KeyError: # pool discarded in the meantime
+                        continue
+                    num_requests += pool.num_requests
+                    num_connections += pool.num_connections
+
+        return (num_requests, num_connections, max(0, num_requests - num_connections))
+
+    def close(self):
+        with self.lock_:
+            for session in self.sessions_.values():
+                session.close()
+            self.sessions_ = dict()
@@ -6,6 +6,7 @@ class Test:
 
         self.passed_ = True
         self.failures_ = list()
+        self.groups_ = list()
 
     def append(self, webpage):
         """
@@ -16,6 +17,16 @@ class Test:
         self.passed_ = False
         self.failures_.append(webpage)
 
+    def append_group(self, webpages):
+        """
+        Append a group of related webpages (eg. duplicates) to failures
+        Passed = False
+        """
+
+        self.groups_.append(webpages)
+        for webpage in webpages:
+            self.append(webpage)
+
     def set_passed(self, passed):
         self.passed_ = passed
     
@@ -46,3 +57,6 @@ class Test:
     def get_failures(self):
         return self.failures_
 
+    def get_groups(self):
+        return self.groups_
+
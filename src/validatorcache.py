@@ -0,0 +1,173 @@
+import os
+import time
+import cPickle as pickle
+from hashlib import sha1
+from threading import Lock
+
+class ValidatorCache:
+    version = 2 # format of the entries
+    
+    def __init__(self, directory, max_size, signature):
+        """
+        Initialise an instance of ValidatorCache
+
+        On-disk cache keyed by URL
+        It stores the validators (ETag, Last-Modified) of a webpage, the digest of its source code and the data extracted from it
+        so that a later scan can send conditional queries and re-use the data on 304 answers or when the source code did not change
+
+        directory: where entries are stored (one file per URL)
+        max_size : maximal size of the cache in bytes, least recently used entries are evicted first
+        signature: entries stored with another signature are ignored (cf. SEOCheckManager.get_signature)
+        """
+
+        self.directory_ = directory
+        self.max_size_ = max_size
+        self.signature_ = signature
+        self.lock_ = Lock()
+
+        self.num_hits_ = 0
+        self.num_unchanged_ = 0
+        self.num_misses_ = 0
+        self.num_evictions_ = 0
+
+        if not os.path.isdir(self.directory_):
+            os.makedirs(self.directory_)
+
+        # filename: [size, last access]
+        self.entries_ = dict()
+        self.size_ = 0
+        for filename in os.listdir(self.directory_):
+            if filename.endswith(".tmp"):
+                continue
+            stat = os.stat(os.path.join(self.directory_, filename))
+            self.entries_[filename] = [stat.st_size, stat.st_mtime]
+            self.size_ += stat.st_size
+
+    @staticmethod
+    def get_filename(url):
+        return sha1(url.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def get_conditional_headers(entry):
+        """
+        Return the headers of a conditional query for a stored entry
+        """
+
+        headers = dict()
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last-modified"]:
+            headers["If-Modified-Since"] = entry["last-modified"]
+        return headers
+
+    def get(self, url):
+        """
+        Return the entry stored for url
+        None if there is no valid entry
+        """
+
+        filename = ValidatorCache.get_filename(url)
+        with self.lock_:
+            if filename not in self.entries_:
+                return None
+
+        try:
+            with open(os.path.join(self.directory_, filename), "rb") as f:
+                entry = pickle.load(f)
+        except (IOError, EOFError, pickle.UnpicklingError):
+            return None
+
+        try:
+            if entry["url"] != url or entry["signature"] != self.signature_ or entry["version"] != ValidatorCache.version:
+                return None
+        except KeyError: # entry stored by an older version
+            return None
+        return entry
+
+    def report_hit(self, url, unchanged=False):
+        """
+        The entry of url has been re-used
+
+        unchanged: the page has been downloaded but its source code did not change
+        """
+
+        filename = ValidatorCache.get_filename(url)
+        with self.lock_:
+            if unchanged:
+                self.num_unchanged_ += 1
+            else:
+                self.num_hits_ += 1
+            try:
+                os.utime(os.path.join(self.directory_, filename), None)
+                self.entries_[filename][1] = time.time()
+            except (KeyError, OSError):
+                pass
+
+    def put(self, webpage):
+        """
+        Store the validators and extracted data of a webpage that has just been downloaded and analysed
+        The webpage is counted as a miss
+        """
+
+        with self.lock_:
+            self.num_misses_ += 1
+
+        entry = {
+            "url": webpage.url,
+            "version": ValidatorCache.version,
+            "signature": self.signature_,
+            "digest": webpage.content_digest,
+            "etag": webpage.etag,
+            "last-modified": webpage.last_modified,
+            "status": webpage.status,
+            "content-type": webpage.content_type,
+            "content-length": webpage.content_length,
+            "extraction": webpage.extraction,
+        }
+        data = pickle.dumps(entry, pickle.HIGHEST_PROTOCOL)
+
+        filename = ValidatorCache.get_filename(webpage.url)
+        path = os.path.join(self.directory_, filename)
+        with self.lock_:
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.rename(path + ".tmp", path)
+
+            try:
+                self.size_ -= self.entries_[filename][0]
+            except KeyError:
+                pass
+            self.entries_[filename] = [len(data), os.stat(path).st_mtime]
+            self.size_ += len(data)
+
+            self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits in max_size
+
+        Must be called with self.lock_ acquired
+        """
+
+        if self.size_ <= self.max_size_:
+            return
+
+        filenames = sorted(self.entries_.keys(), key=lambda filename: self.entries_[filename][1])
+        for filename in filenames:
+            if self.size_ <= self.max_size_:
+                break
+            try:
+                os.remove(os.path.join(self.directory_, filename))
+            except OSError:
+                pass
+            self.size_ -= self.entries_[filename][0]
+            del self.entries_[filename]
+            self.num_evictions_ += 1
+
+    def get_stats(self):
+        """
+        Return (number of 304 hits, number of unchanged source codes, number of misses, number of evictions)
+        """
+
+        with self.lock_:
+            return (self.num_hits_, self.num_unchanged_, self.num_misses_, self.num_evictions_)
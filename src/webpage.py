@@ -1,12 +1,54 @@
 import requests
 import re
-from hashlib import sha512
+import time
+import random
+import codecs
+from email.utils import parsedate_tz, mktime_tz
+from hashlib import sha1, sha512
 from webpageparser import WebPageParser, WebPageNode
+from validatorcache import ValidatorCache
+from minhashindex import MinHashBuilder
+
+class SourceCodeBuffer:
+    def __init__(self):
+        """
+        Initialise an instance of SourceCodeBuffer
+
+        Receives the source code of a webpage instead of a WebPageParser
+        when it is parsed later in another process (cf. AnalysisPool)
+        """
+
+        self.chunks_ = list()
+
+    def feed(self, data):
+        self.chunks_.append(data)
+
+    def get_source_code(self):
+        return u"".join(self.chunks_)
 
 class WebPage:
-    titles_seen = dict()
-    descriptions_seen = dict() # hash for description: id of the first webpage
 
+    # delays between two tries (seconds)
+    retry_backoff = 0.5 # exponential backoff: random delay in [0 ; retry_backoff * 2^(try-1)]
+    retry_backoff_max = 30.
+    retry_after_max = 120. # maximal delay accepted from a Retry-After header
+
+    chunk_size = 16 * 1024 # size of the chunks read when downloading a content
+
+    # changed with the content of extract's result: stored extractions of other versions are ignored (cf. ValidatorCache)
+    extraction_version = "5"
+
+    # selectors used by extract (in addition to the ones of SEOCheckManager)
+    selector_ressources = "script[src] , link[href] , img[src] , iframe[src] , object[data] , applet[code]"
+    selector_nofollow = "meta[name=robots][content*=nofollow]"
+    selector_links = "a[href]"
+    selector_noindex = "head > meta[name=robots][content*=noindex]"
+    selector_title = "head > title"
+    selector_description = "head > meta[name=description][content]"
+
+    # values of link[rel] whose targets are webpages rather than ressources
+    document_rels = ("canonical", "alternate", "next", "prev")
+    
     regex_url = re.compile(r'(?:http[s]?:/|)/(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
     
     def __init__(self, url, depth=0, internal=True):
@@ -20,25 +62,33 @@ class WebPage:
         self.internal = internal
         self.noindex = False
 
-        self.link_used_by = list()
-        self.ressource_used_by = list()
-
-        self.link_towards_ext = None # None => not analysed
-        self.link_towards_int = None
-        self.ressource_from = None
+        # links and ressources between pages are stored by the LinkGraph(s) of the website (cf. WebSite.retrieve_webpage)
+        self.scanned = False # queried by fetch, otherwise its availability is only checked by verify
+        self.document = False # ressource that can be an HTML webpage (eg. iframe), it is crawled like linked webpages
+        self.analysed = False # its failures have to be reported to the pages using it
         
         self.has_brokenlinks = False
         self.has_brokenressources = False
 
+        # internal links (cf. WebSite.analyse_links), None if not computed
+        self.click_depth = None
+        self.num_inlinks = None
+        self.pagerank = None
+
         self.server_unreachable = False
         self.server_invalid_query = False
         self.status = 0
         self.content_type = None
         self.content_length = None
+        self.etag = None
+        self.last_modified = None
+        self.content_digest = None
+        self.truncated = False # content larger than the maximal size allowed
         
         self.duplicated_title = False
         self.duplicated_description = False
         self.check_dict = None
+        self.extraction = None # data extracted from the source code (cf. extract)
     
     def get_url(self):
         return self.url
@@ -60,20 +110,14 @@ class WebPage:
             return "%d%s" % (int(length), units[unit])
         return "%d.%d%s" % (int(length), int((length*10.)%10), units[unit])
 
-    def add_link_used_by(self, from_wp):
+    def is_broken(self):
         """
-        A scanned webpage has a link towards this page
+        Return True if the webpage has been analysed and is not available
+        the pages using it are then reported (cf. WebSite.report_failures)
         """
 
-        self.link_used_by.append(from_wp)
+        return self.analysed and self.status not in (200, 301, 302)
 
-    def add_ressource_used_by(self, from_wp):
-        """
-        A scanned webpage uses this webpage as a resource
-        """
-
-        self.ressource_used_by.append(from_wp)
-    
     def check_failures(func):
         def inner(*args, **kwargs):
             output = func(*args, **kwargs)
@@ -81,56 +125,160 @@ class WebPage:
             self = args[0]
             print "depth=%d, url=%s [%s][%d]" % (self.depth, self.url, self.content_type, self.status)
             
-            if self.status not in (200, 301, 302):
-                for wp in self.link_used_by:
-                    wp.has_brokenlinks = True
-                for wp in self.ressource_used_by:
-                    wp.has_brokenressources = True
+            self.analysed = True
             return output
         return inner
+
+    def get_state(self):
+        """
+        Return a compact and picklable state of the webpage (cf. Checkpoint)
+
+        Relationships with other pages are not part of the state:
+        they are rebuilt by applying the extraction of scanned pages again (cf. WebSite.restore)
+        """
+
+        return (self.url, self.depth, self.internal, self.scanned, self.status, self.content_type, self.content_length, self.etag, self.last_modified, self.content_digest, self.server_unreachable, self.server_invalid_query, self.extraction)
+
+    @staticmethod
+    def from_state(state):
+        """
+        Return the WebPage corresponding to a state returned by get_state
+        """
+
+        wp = WebPage(state[0], state[1], state[2])
+        if state[3]: # scanned
+            wp.scanned = True
+            wp.analysed = True
+        wp.status, wp.content_type, wp.content_length, wp.etag, wp.last_modified, wp.content_digest, wp.server_unreachable, wp.server_invalid_query, wp.extraction = state[4:]
+        return wp
     
-    def carryout_request(self, full_request, num_retry=0):
+    def carryout_request(self, sessionpool, hostscheduler, full_request, num_retry=0, stream=False, headers=None, max_size=None, webpageparser=None):
         """
         Try to get the webpage content/header of self.url
+        The host is considered unreachable without any query if its circuit breaker is open
+
+        cf. carryout_request_ for the parameters
+        """
+
+        if hostscheduler.is_open(self.url):
+            print "Circuit open: %s" % self.url
+            self.server_unreachable = True
+            self.server_invalid_query = False
+            return None
+
+        return self.carryout_request_(sessionpool, hostscheduler, full_request, num_retry, stream, headers, max_size, webpageparser)
+
+    def get_retry_delay(self, retry, webpage):
+        """
+        Return the time to wait before the next try
+
+        Retry-After header is honored for 429 and 503 answers
+        Otherwise: exponential backoff with jitter
+        """
+
+        if webpage is not None and webpage is not False and webpage.status_code in (429, 503):
+            try:
+                retry_after = webpage.headers['retry-after'].strip()
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+                else:
+                    delay = mktime_tz(parsedate_tz(retry_after)) - time.time()
+                return max(0., min(delay, WebPage.retry_after_max))
+            except KeyError:
+                pass
+            except TypeError: # invalid date
+                pass
+
+        return random.uniform(0., min(WebPage.retry_backoff_max, WebPage.retry_backoff * 2 ** (retry -1)))
+
+    def carryout_request_(self, sessionpool, hostscheduler, full_request, num_retry=0, stream=False, headers=None, max_size=None, webpageparser=None):
+        """
+        Try to get the webpage content/header of self.url
+        Queries go through sessionpool in order to re-use connections
 
         full_request  : content
         ! full_request: header
 
+        stream: single query replacing header+content queries (requires full_request)
+        The header is read first, the content is only downloaded for successful HTML webpages
+        Redirections are not followed (same status as a header query)
+
+        headers: additional headers of the query (eg. conditional query)
+
+        The content is downloaded by chunks (cf. read_content):
+        max_size     : maximal number of bytes read (None => no limit)
+        webpageparser: receives the content of successful HTML webpages while it is downloaded
+
         It will retry num_retry times before stopping. The maximum number of tries is num_retry +1
+        Every try waits for hostscheduler to allow a query towards the host of self.url
+        the host is released between two tries, delays before retrying are spent outside of it
+        Failures to connect are reported to hostscheduler (circuit breaker)
         """
         
         retry = 0
         webpage = None
         
         while retry <= num_retry and not webpage:
+            if retry > 0:
+                delay = self.get_retry_delay(retry, webpage)
+                if webpage is not None and webpage is not False: # unsuccessful answer
+                    webpage.close()
+                webpage = None
+                time.sleep(delay)
+                if hostscheduler.is_open(self.url):
+                    self.server_unreachable = True
+                    self.server_invalid_query = False
+                    return None
+            
             retry += 1
             print "Try #%d: %s" % (retry, self.url)
             self.server_unreachable = False
             self.server_invalid_query = False
+            hostscheduler.acquire(self.url)
             try:
-                if full_request:
-                    webpage = requests.get(self.url, timeout=10)
+                if stream:
+                    webpage = sessionpool.get(self.url, timeout=10, stream=True, allow_redirects=False, headers=headers)
+                elif full_request:
+                    webpage = sessionpool.get(self.url, timeout=10, stream=True, headers=headers)
                 else:
-                    webpage = requests.head(self.url, timeout=10)
-            except requests.ConnectionError:
+                    webpage = sessionpool.head(self.url, timeout=10, headers=headers)
+            except requests.ConnectionError: # including ConnectTimeout
                 self.server_unreachable = True
-                wbepage = None
-            except requests.exceptions.Timeout:
+                webpage = None
+                hostscheduler.report_failure(self.url)
+            except requests.exceptions.Timeout: # the server is reachable but too slow to answer
                 self.server_unreachable = True
                 webpage = None
             except requests.HTTPError:
                 self.server_invalid_query = True
                 webpage = False
-            except requests.exceptions.TooManyRedirects:
-                self.server_invalid_query = True
-                return None
-            except requests.exceptions.InvalidSchema:
+            except requests.exceptions.RequestException: # TooManyRedirects, InvalidSchema, MissingSchema, InvalidURL...
                 self.server_invalid_query = True
                 return None
+            else:
+                hostscheduler.report_success(self.url)
+            finally:
+                # the host of a successful answer is released once its content has been read
+                if not webpage:
+                    hostscheduler.release(self.url)
 
         if not webpage:
+            if webpage is not None and webpage is not False: # unsuccessful answer to the last try
+                webpage.close()
             return None
         
+        # the host is released once the content has been read
+        try:
+            self.read_answer_(webpage, full_request, stream, max_size, webpageparser)
+        finally:
+            hostscheduler.release(self.url)
+        return webpage
+
+    def read_answer_(self, webpage, full_request, stream, max_size, webpageparser):
+        """
+        Read status, headers and content (cf. read_content) of a successful query
+        """
+
         # Status
         self.status = webpage.status_code
         
@@ -143,11 +291,29 @@ class WebPage:
         except KeyError:
             pass
 
+        # Validators (for later conditional queries)
+        try:
+            self.etag = webpage.headers['etag']
+        except KeyError:
+            pass
+        try:
+            self.last_modified = webpage.headers['last-modified']
+        except KeyError:
+            pass
+
         # Content-length
         # The best way to get the real value of content-length is to compute it from the data
         # The value returned by a server during head/get query for non-static files is not good (except on custom configurations of Apache)
+        is_html = self.status == 200 and self.content_type and "text/html" in self.content_type
+        if stream and not is_html:
+            # Drop the connection without downloading the content
+            webpage.close()
+            full_request = False
+        
         if full_request:
-            self.content_length = len(webpage.text)
+            if not is_html:
+                webpageparser = None
+            self.content_length = self.read_content(webpage, max_size, webpageparser)
         else:
             try:
                 self.content_length = int(webpage.headers['content-length'])
@@ -157,36 +323,118 @@ class WebPage:
                 pass
             except KeyError:
                    pass
-
-        return webpage
     
-    def sourcecode_analysis(self, html_code, website, seocheckmanager, nofollow, noindex):
+    def read_content(self, webpage, max_size=None, webpageparser=None):
         """
-        Analyse the source code of the webpage
-        in order to give relevant details concerning ways to improve the ranking of the website
+        Download the content of a streamed answer by chunks
+        Chunks are decoded and fed to webpageparser (if any) as soon as they are received
 
-        This analysis focus on:
-        + Gathering data for SEOChecks
-        + Adding probes in order to check the availability of ressources (images, favicons, iframes, applets, stylesheets or js scripts)
-        + Adding probes to crawl pages that are directly linked to this one
-        + Getting title and description to find possible duplicates beween different pages
+        Return the number of bytes read
+        Only the first max_size bytes are read (None => no limit), self.truncated is set if the content is larger
         """
+
+        decoder = None
+        if webpageparser:
+            try:
+                decoder = codecs.getincrementaldecoder(webpage.encoding or 'utf-8')('replace')
+            except LookupError: # unknown encoding
+                decoder = codecs.getincrementaldecoder('utf-8')('replace')
+
+        digest = sha1()
+        length = 0
+        self.truncated = False
+        try:
+            for chunk in webpage.iter_content(WebPage.chunk_size):
+                if max_size and length + len(chunk) > max_size:
+                    chunk = chunk[:max_size - length]
+                    self.truncated = True
+                
+                length += len(chunk)
+                digest.update(chunk)
+                if decoder:
+                    webpageparser.feed(decoder.decode(chunk))
+                
+                if self.truncated:
+                    print "Truncated content (>%d bytes): %s" % (max_size, self.url)
+                    break
+        except requests.exceptions.ChunkedEncodingError:
+            self.truncated = True
+        except requests.ConnectionError:
+            self.truncated = True
+        except requests.exceptions.Timeout:
+            self.truncated = True
+        finally:
+            webpage.close()
+
+        if decoder:
+            webpageparser.feed(decoder.decode('', True))
         
-        webpageparser = WebPageParser()
-        webpageparser.feed(html_code)
+        self.content_digest = digest.hexdigest()
+        return length
+    
+    @staticmethod
+    def get_selectors(seocheckmanager):
+        """
+        Return the selectors used by extract
+        """
+
+        selectors = list(seocheckmanager.get_css_selectors())
+        selectors += [WebPage.selector_ressources, WebPage.selector_nofollow, WebPage.selector_links,
+                WebPage.selector_noindex, WebPage.selector_title, WebPage.selector_description]
+        return selectors
+
+    @staticmethod
+    def create_parser(seocheckmanager, backend="python"):
+        """
+        Return a WebPageParser ready for extract
+        The selectors are evaluated while the source code is parsed (streaming mode)
+        a tree is only built if one of them requires it
+
+        backend: cf. WebPageParser
+        """
+
+        return WebPageParser(WebPage.get_selectors(seocheckmanager), backend)
+    
+    @staticmethod
+    def extract(webpageparser, seocheckmanager):
+        """
+        Extract from the source code of the webpage (fed to webpageparser) the data required by its analysis
+
+        The result does not depend on the parameters of the scan
+        and only contains picklable values (it can be stored between two scans):
+        + check_dict: data for SEOChecks
+        + ressources: urls of the ressources (images, favicons, iframes, applets, stylesheets or js scripts)
+        + documents: urls of the ressources that can be HTML webpages (iframes, link[rel=canonical/alternate/next/prev])
+        + links: (url, rel=nofollow) for the pages that are directly linked to this one
+        + nofollow/noindex: meta[name=robots] values
+        + title/description: digests used to find possible duplicates beween different pages
+        + minhash: signature of the text, title and description used to find near-duplicates (cf. MinHashIndex)
+        """
         
+        extraction = dict()
+
+        # Every selector is evaluated at once
+        nodes_per_selector = webpageparser.find_many(WebPage.get_selectors(seocheckmanager))
+
         # SEOCheckManager
-        self.check_dict = seocheckmanager.generate_webpage_check_dict(webpageparser)
+        extraction["check_dict"] = seocheckmanager.generate_webpage_check_dict(webpageparser, nodes_per_selector)
         
         # Look for ressources
-        nodes_ressources = webpageparser.find("script[src] , link[href] , img[src] , iframe[src] , object[data] , applet[code]")
+        ressources = list()
+        documents = list()
+        nodes_ressources = nodes_per_selector[WebPage.selector_ressources]
         for node in nodes_ressources:
             try:
                 node_tag = node.get_tag()
                 node_attrs = node.get_attrs()
                 
+                document = node_tag == "iframe"
                 if node_tag == "link":
                     url = node_attrs["href"]
+                    try:
+                        document = len([rel for rel in (node_attrs["rel"] or u"").lower().split() if rel in WebPage.document_rels]) > 0
+                    except KeyError:
+                        pass
                 elif node_tag == "object":
                     url = node_attrs["data"]
                 elif node_tag == "applet":
@@ -195,94 +443,229 @@ class WebPage:
                     url = node_attrs["src"]
                 m_url = WebPage.regex_url.match(url)
                 if m_url:
-                    wp = website.retrieve_webpage(self, url, True)
-                    self.ressource_from.append(wp)
-                    if wp.status and wp.status not in (200, 301, 302):
-                        self.has_brokenressources = True
+                    ressources.append(url)
+                    if document:
+                        documents.append(url)
             except KeyError:
                 pass
+        extraction["ressources"] = ressources
+        extraction["documents"] = documents
         
         # meta[name=robots]
-        nofollow_global = False
-        if nofollow:
-            nodes = webpageparser.find("meta[name=robots][content*=nofollow]")
-            if len(nodes) >= 1:
-                nofollow_global = True
+        nodes = nodes_per_selector[WebPage.selector_nofollow]
+        extraction["nofollow"] = len(nodes) >= 1
         
         # Look for other pages
-        if not nofollow_global:
-            nodes_a = webpageparser.find("a[href]")
-            for node in nodes_a:
+        links = list()
+        nodes_a = nodes_per_selector[WebPage.selector_links]
+        for node in nodes_a:
+            try:
+                node_attrs = node.get_attrs()
+                
+                url = node_attrs["href"]
                 try:
-                    node_attrs = node.get_attrs()
-                    
-                    url = node_attrs["href"]
-                    try:
-                        nofollow_local = "nofollow" in node_attrs["rel"]
-                    except KeyError:
-                        nofollow_local = False
-
-                    if nofollow and nofollow_local:
-                        continue
-
-                    m_url = WebPage.regex_url.match(url)
-                    if m_url:
-                        wp = website.retrieve_webpage(self, url)
-                        if wp.internal:
-                            self.link_towards_int.append(wp)
-                        else:
-                            self.link_towards_ext.append(wp)
-                        if wp.status and wp.status not in (200, 301, 302):
-                            self.has_brokenlinks = True
+                    nofollow_local = "nofollow" in node_attrs["rel"]
                 except KeyError:
-                    pass
+                    nofollow_local = False
+
+                m_url = WebPage.regex_url.match(url)
+                if m_url:
+                    links.append((url, nofollow_local))
+            except KeyError:
+                pass
+        extraction["links"] = links
         
         # title / description
-        nodes = webpageparser.find("head > meta[name=robots][content*=noindex]")
-        if len(nodes) >= 1:
-            self.noindex = True
-            
-            if noindex:
-                return
+        nodes = nodes_per_selector[WebPage.selector_noindex]
+        extraction["noindex"] = len(nodes) >= 1
 
-        nodes = webpageparser.find("head > title")
+        extraction["title"] = None
+        nodes = nodes_per_selector[WebPage.selector_title]
         if len(nodes) >= 1:
             node = nodes[0]
             title = node.get_data()
             if title:
-                title_digest = sha512(title.encode('utf-8')).digest()
-                if title_digest in WebPage.titles_seen.keys():
-                    self.duplicated_title = True
-                    WebPage.titles_seen[title_digest].duplicated_title = True
-                else:
-                    WebPage.titles_seen[title_digest] = self
+                extraction["title"] = sha512(title.encode('utf-8')).digest()
 
-        nodes = webpageparser.find("head > meta[name=description][content]")
+        extraction["description"] = None
+        description = None
+        nodes = nodes_per_selector[WebPage.selector_description]
         if len(nodes) >= 1:
             node = nodes[0]
             description = node.get_attrs()["content"]
             if description:
-                description_digest = sha512(description.encode('utf-8')).digest()
-                if description_digest in WebPage.descriptions_seen.keys():
-                    self.duplicated_description = True
-                    WebPage.descriptions_seen[description_digest].duplicated_description = True
-                else:
-                    WebPage.descriptions_seen[description_digest] = self
+                extraction["description"] = sha512(description.encode('utf-8')).digest()
 
-    @check_failures
-    def scan(self, website, seocheckmanager, noindex, nofollow, deep, num_retry):
+        description_signature = MinHashBuilder()
+        description_signature.feed(description or u"")
+        extraction["minhash"] = webpageparser.get_text_signature(description_signature)
+
+        return extraction
+    
+    def apply_extraction(self, extraction, website, nofollow, noindex):
         """
-        Scan the webpage
-        looking for relationships with other pages
+        Report the data extracted from the source code (cf. extract) into the website
+        """
+        
+        self.extraction = extraction
+        self.check_dict = extraction["check_dict"]
+        
+        # Ressources
+        documents = set(extraction["documents"])
+        for url in extraction["ressources"]:
+            wp = website.retrieve_webpage(self, url, True)
+            if url in documents:
+                wp.document = True
+            if wp.status and wp.status not in (200, 301, 302):
+                self.has_brokenressources = True
+        
+        # Other pages
+        if not (nofollow and extraction["nofollow"]):
+            for url, nofollow_local in extraction["links"]:
+                if nofollow and nofollow_local:
+                    continue
+
+                wp = website.retrieve_webpage(self, url)
+                if wp.status and wp.status not in (200, 301, 302):
+                    self.has_brokenlinks = True
+        
+        # title / description
+        if extraction["noindex"]:
+            self.noindex = True
+            
+            if noindex:
+                return
+
+        title_digest = extraction["title"]
+        if title_digest:
+            first_webpage = website.register_title(title_digest, self)
+            if first_webpage is not None:
+                self.duplicated_title = True
+                first_webpage.duplicated_title = True
+
+        description_digest = extraction["description"]
+        if description_digest:
+            first_webpage = website.register_description(description_digest, self)
+            if first_webpage is not None:
+                self.duplicated_description = True
+                first_webpage.duplicated_description = True
+
+        if extraction["minhash"] is not None:
+            website.register_minhash(extraction["minhash"], self)
+
+    def sourcecode_analysis(self, html_code, website, seocheckmanager, nofollow, noindex, backend="python"):
+        """
+        Analyse the source code of the webpage
+        in order to give relevant details concerning ways to improve the ranking of the website
+
+        This analysis focus on:
+        + Gathering data for SEOChecks
+        + Adding probes in order to check the availability of ressources (images, favicons, iframes, applets, stylesheets or js scripts)
+        + Adding probes to crawl pages that are directly linked to this one
+        + Getting title and description to find possible duplicates beween different pages
         """
         
-        self.link_towards_ext = list()
-        self.link_towards_int = list()
-        self.ressource_from = list()
+        webpageparser = WebPage.create_parser(seocheckmanager, backend)
+        webpageparser.feed(html_code)
         
-        webpage_header = self.carryout_request(False, num_retry)
+        self.apply_extraction(self.extract(webpageparser, seocheckmanager), website, nofollow, noindex)
+
+    def load_cache_entry(self, entry):
+        """
+        Re-use the data stored in a ValidatorCache entry
+        """
+
+        self.status = entry["status"]
+        self.content_type = entry["content-type"]
+        self.content_length = entry["content-length"]
+        self.etag = entry["etag"]
+        self.last_modified = entry["last-modified"]
+        self.content_digest = entry["digest"]
+        self.extraction = entry["extraction"]
+
+    @staticmethod
+    def new_parser_(seocheckmanager, backend):
+        if seocheckmanager:
+            return WebPage.create_parser(seocheckmanager, backend)
+        return WebPageParser(backend=backend)
+
+    def reuse_unchanged_content(self, webpageparser, entry, validatorcache, seocheckmanager, backend, buffered):
+        """
+        Compare the digest of the source code (cf. read_content) with the one stored in a ValidatorCache entry
+
+        Return None if the source code did not change (self.extraction is then loaded from the cache)
+        webpageparser otherwise: with an entry, it is a SourceCodeBuffer parsed here unless buffered is set
+        """
+
+        if not entry:
+            return webpageparser
+
+        if entry["digest"] == self.content_digest:
+            self.extraction = entry["extraction"]
+            validatorcache.report_hit(self.url, True)
+            return None
+
+        if buffered:
+            return webpageparser
+        sourcecode_buffer = webpageparser
+        webpageparser = WebPage.new_parser_(seocheckmanager, backend)
+        webpageparser.feed(sourcecode_buffer.get_source_code())
+        return webpageparser
+
+    def fetch(self, sessionpool, hostscheduler, validatorcache, deep, num_retry, single_request=False, max_size=None, seocheckmanager=None, backend="python", buffered=False):
+        """
+        Carry out the network queries required to scan the webpage
+
+        Return a WebPageParser fed with the source code of the webpage iff it has to be analysed, None otherwise
+        The source code is parsed while it is downloaded, at most max_size bytes are read (None => no limit)
+        except if validatorcache has an entry for the webpage: it is then parsed only if its digest changed
+        Only modifies self: it can be called from several threads at once (one thread per WebPage)
+
+        validatorcache: if not None, queries towards internal pages are conditional
+                        on a 304 answer or an unchanged source code, self.extraction is loaded from the cache and None is returned
+        single_request: one streaming query instead of header+content queries (ignored for deep analysis)
+        seocheckmanager: if not None, the parser only keeps the data required by extract (cf. create_parser)
+        backend: parser backend (cf. WebPageParser)
+        buffered: the source code is not parsed, a SourceCodeBuffer is returned instead of a WebPageParser
+        """
+        
+        self.scanned = True
+        self.extraction = None
+
+        entry = None
+        headers = None
+        if validatorcache and self.internal:
+            entry = validatorcache.get(self.url)
+            if entry:
+                headers = ValidatorCache.get_conditional_headers(entry)
+        
+        # with a cache entry, the source code is buffered: it is only parsed if it changed (cf. reuse_unchanged_content)
+        webpageparser = None
+        if self.internal:
+            if buffered or entry:
+                webpageparser = SourceCodeBuffer()
+            else:
+                webpageparser = WebPage.new_parser_(seocheckmanager, backend)
+        
+        if single_request and not deep and self.internal:
+            webpage_query = self.carryout_request(sessionpool, hostscheduler, True, num_retry, True, headers, max_size, webpageparser)
+            if not webpage_query:
+                return None
+            if self.status == 304 and entry:
+                self.load_cache_entry(entry)
+                validatorcache.report_hit(self.url)
+                return None
+            if self.status != 200 or not self.internal or not self.content_type or "text/html" not in self.content_type:
+                return None
+            return self.reuse_unchanged_content(webpageparser, entry, validatorcache, seocheckmanager, backend, buffered)
+        
+        webpage_header = self.carryout_request(sessionpool, hostscheduler, False, num_retry, False, headers)
         if not webpage_header:
-            return
+            return None
+        if self.status == 304 and entry:
+            self.load_cache_entry(entry)
+            validatorcache.report_hit(self.url)
+            return None
 
         # Not a success
         # or external page
@@ -290,29 +673,82 @@ class WebPage:
             if not self.content_type: # if content-type is not defined for deep analysis: full request
                 pass
             elif self.status not in (200, 301, 302) or "text/html" not in self.content_type:
-                return
+                return None
         else:
             if self.status != 200 or not self.internal or not self.content_type or "text/html" not in self.content_type:
-                return
+                return None
         
         self.status = 0
         self.content_length = None
-        webpage_query = self.carryout_request(True, num_retry)
+        webpage_query = self.carryout_request(sessionpool, hostscheduler, True, num_retry, False, headers, max_size, webpageparser)
         if not webpage_query:
-            return
+            return None
         
         # Status can change when we run a get query
         # eg. 500 status can be caused by a programming error that cancels the generation of the page
+        if self.status == 304 and entry:
+            self.load_cache_entry(entry)
+            validatorcache.report_hit(self.url)
+            return None
         if self.status != 200:
-            return
+            return None
         
         # Stop there for external webpages and deep analysis
         if not self.internal:
+            return None
+
+        return self.reuse_unchanged_content(webpageparser, entry, validatorcache, seocheckmanager, backend, buffered)
+
+    def needs_crawl(self, links):
+        """
+        Return True if the webpage has to be crawled (and its source code analysed if it is an HTML webpage)
+        False if its availability only has to be checked (cf. verify): external webpages and ressources
+
+        Internal webpages are crawled if they are linked by another webpage (a[href])
+        or used as a ressource that can be an HTML webpage (cf. extract: documents)
+
+        links: LinkGraph of the links between the webpages
+        """
+
+        return self.internal and (self.id == 0 or self.document or links.get_in_degree(self.id) > 0)
+
+    def verify(self, sessionpool, hostscheduler, deep, num_retry):
+        """
+        Check the availability of an external webpage or a ressource
+        Only a header query is carried out, except for deep analysis (cf. fetch)
+
+        Only modifies self: it can be called from several threads at once (one thread per WebPage)
+        """
+
+        if deep:
+            self.fetch(sessionpool, hostscheduler, None, deep, num_retry)
             return
+        
+        self.carryout_request(sessionpool, hostscheduler, False, num_retry)
+
+    @check_failures
+    def analyse(self, webpageparser, website, seocheckmanager, noindex, nofollow):
+        """
+        Analyse the source code previously parsed by fetch
+        or the data loaded by fetch from a ValidatorCache
+        and report failures to the pages using this one
+        """
 
-        self.sourcecode_analysis(webpage_query.text, website, seocheckmanager, nofollow, noindex)
+        if webpageparser is not None:
+            self.apply_extraction(self.extract(webpageparser, seocheckmanager), website, nofollow, noindex)
+        elif self.extraction:
+            self.apply_extraction(self.extraction, website, nofollow, noindex)
         return
 
+    def scan(self, website, seocheckmanager, sessionpool, hostscheduler, noindex, nofollow, deep, num_retry):
+        """
+        Scan the webpage
+        looking for relationships with other pages
+        """
+        
+        webpageparser = self.fetch(sessionpool, hostscheduler, None, deep, num_retry, seocheckmanager=seocheckmanager)
+        self.analyse(webpageparser, website, seocheckmanager, noindex, nofollow)
+
     def get_check_dict(self):
         return self.check_dict
 
@@ -1,9 +1,19 @@
-import re
+import heapq
 from HTMLParser import HTMLParser
+from htmlentitydefs import name2codepoint
+from cssselector import CSSSelector, SelectorCache
+from minhashindex import MinHashBuilder
 
-class WebPageNode:
-    previous_results = dict()
-    regex_remove_useless_spaces = re.compile(r'\s*([^\s].*[^\s])\s*') # works iff useful value has at least 2 characters, otherwise no effect
+try:
+    from lxml import etree
+except ImportError: # the lxml backend is optional
+    etree = None
+
+class WebPageNode(object):
+    # nodes are numerous: no __dict__ per node
+    __slots__ = ("tag_", "attrs_", "parent_", "previous_", "order_", "nodes_", "data_")
+
+    selector_cache = SelectorCache() # shared by every thread, see compile_selector
     
     def __init__(self, tag, attrs, parent=None):
         """
@@ -11,21 +21,31 @@ class WebPageNode:
         """
 
         self.tag_ = tag
-        self.attrs_ = dict(attrs)
+        self.attrs_ = dict(attrs) if attrs else None # None when the node has no attribute
         self.parent_ = parent
+        self.previous_ = None # previous sibling
+        self.order_ = None # position in the document (set by WebPageParser)
 
-        self.nodes_ = list()
+        self.nodes_ = () # replaced by a list when the first child is appended
         self.data_ = None
     
     def get_tag(self):
         return self.tag_
     
     def get_attrs(self):
+        if self.attrs_ is None:
+            return dict()
         return self.attrs_
     
     def get_data(self):
         return self.data_
 
+    def get_previous_sibling(self):
+        return self.previous_
+
+    def get_order(self):
+        return self.order_
+
     def get_next_child(self, current):
         found = False
         for node in self.nodes_:
@@ -51,265 +71,67 @@ class WebPageNode:
     @staticmethod
     def free_selector():
         """
-        Delete css_selector_to_query_elts's previous results
-
-        css_selector_to_query_elts's results are kept into the static variable
-        WebPageNode.previous_results under the key value "css-selector"
-
-        each call to css_selector_to_query_elts() stores its corresponding result
-        into previous_results
+        Delete compile_selector's previous results
         """
 
-        del WebPageNode.previous_results["css-selector"]
+        WebPageNode.selector_cache.clear()
 
     @staticmethod
-    def css_selector_to_query_elts(css_selector_query):
+    def compile_selector(css_selector_query):
         """
-        Convert CSS selector to a list of subqueries
-        cf. CSS Selectors: http://www.w3schools.com/cssref/css_selectors.asp
+        Return the CSSSelector corresponding to css_selector_query
+        Selectors are compiled once and then re-used for every node and every page
 
-        CSS selectors which are not implemented:
-        + :......
-        
-        For the following CSS selectors, make sure to use space character
-        + elt1 + elt2
-        + elt1 ~ elt2
-        + elt1 > elt2
-
-        eg.: head meta[description]
-        eg.: p.myclass
-        eg.: a[target=blank_]
+        Compiled selectors are kept into WebPageNode.selector_cache (bounded, least recently used ones are evicted)
+        It is safe to call compile_selector and find from several threads at once
         """
         
-        if ',' in css_selector_query:
-            css_selector_queries = css_selector_query.split(",")
-            return [WebPageNode.css_selector_to_query_elts(css) for css in css_selector_queries]
-        
-        # Remove in-front and trailing spaces
-        css_selector_query = WebPageNode.regex_remove_useless_spaces.sub('\g<1>', css_selector_query)
-
-        # Try to find the query in the values that have already been computed
-        try:
-            WebPageNode.previous_results["css-selector"]
-        except KeyError:
-            WebPageNode.previous_results["css-selector"] = dict()
-        try:
-            if WebPageNode.previous_results["css-selector"][css_selector_query]:
-                return WebPageNode.previous_results["css-selector"][css_selector_query]
-        except KeyError:
-            pass
-
-        regex_tag = re.compile(r'^([^\.\[\]#]*)')
-        regex_id = re.compile(r'(^|[^\.\[\]#\'"=])#([^\.\[\]#]*)')
-        regex_class = re.compile(r'(^|[^\.\[\]#\'"=])\.([^\.\[\]#]*)')
-        regex_attr = re.compile(r'\[([^\.\[\]#=\*~\|\^$]*)([\*~\|\^$]?="([^"]*)"|[\*~\|\^$]?=\'([^\']*)\'|[\*~\|\^$]?=([^\]]+)|)\]') 
-        # Artifacts before . or # in regex_id and regex_class have been added in an attempt to be able to catch "a[href='#']" properly
-        # it was considered as: id=' and href=#
-
-        query_elts = list()
-        query_raw_elts = css_selector_query.split(' ');
-        for raw_elt in query_raw_elts:
-            if len(raw_elt) == 0:
-                continue
-
-            # Tag name
-            m = regex_tag.search(raw_elt)
-            if m:
-                tag = m.group(1)
-            else:
-                tag = None
-            
-            # Class & id
-            attrs = dict()
-            m = regex_id.search(raw_elt)
-            if m:
-                attrs["id"] = {"value": m.group(2), "type": "="}
-            m = regex_class.search(raw_elt)
-            if m:
-                attrs["class"] = {"value": m.group(2), "type": "="}
-
-            # Attribute
-            m = regex_attr.findall(raw_elt)
-            for attr_in_query in m:
-                # attr_in_query = (attr_name, value with equal and quotations marks, value (if ="value"), value (if ='value'), value (if =value))
-                if attr_in_query[1]:
-                    if attr_in_query[2]:
-                        attrs[attr_in_query[0]] = {"value": attr_in_query[2], "type": attr_in_query[1][0]}
-                    elif attr_in_query[3]:
-                        attrs[attr_in_query[0]] = {"value": attr_in_query[3], "type": attr_in_query[1][0]}
-                    else:
-                        attrs[attr_in_query[0]] = {"value": attr_in_query[4], "type": attr_in_query[1][0]}
-                else:
-                    attrs[attr_in_query[0]] = None
-            
-            query_elts.append({"tag": tag, "attrs": attrs})
-        
-        WebPageNode.previous_results["css-selector"][css_selector_query] = query_elts
-        return query_elts
+        return WebPageNode.selector_cache.get(css_selector_query)
     
-    def is_fit_query(self, query_elt):
-        """
-        Return True if self fits query_elt
+    def find_(self, selector, nodes):
         """
-        
-        # Tag?
-        try:
-            if query_elt["tag"] and query_elt["tag"] != "*" and self.tag_ != query_elt["tag"]:
-                return False
-        except KeyError: # Tag not specified
-            pass
-
-        # Other attrs?
-        try:
-            attrs = query_elt["attrs"]
-        except KeyError: # No attrs
-            return True
-
-        for name,params in attrs.items():
-            # Check if it exists
-            try:
-                obj_attr = self.attrs_[name]
-            except KeyError:
-                return False
-
-            # For specific values (if required)
-            if not params:
-                continue
+        Append to nodes the WebPageNode(s) of the subtree of self that fit the selector
+        Only the nodes of the subtree of self can be used to fit it
 
-            if params["type"] == "=": # equals
-                if obj_attr != params["value"]:
-                    return False
-            elif params["type"] == "~": # contains the word
-                if not obj_attr.startswith(params["value"]) and not obj_attr.endswith(params["value"]) and " %s " % params["value"] not in obj_attr:
-                    return False
-            elif params["type"] == "|": # starts with value- or equals value
-                if not obj_attr.startswith(params["value"] + "-") and obj_attr != params["value"]:
-                    return False
-            elif params["type"] == "^": # starts with
-                if not obj_attr.startswith(params["value"]):
-                    return False
-            elif params["type"] == "$": # ends with
-                if not obj_attr.endswith(params["value"]):
-                    return False
-            elif params["type"] == "*": # contains
-                if params["value"] not in obj_attr:
-                    return False
-        
-        return True
-
-    def find_(self, query, position_in_query=0):
+        Nodes are appended in document order, each node at most once
         """
-        Return the WebPageNode(s) that fit the query
-        Query is a list of subqueries (usually derived from a CSS selector)
-        """
-        
-        if len(query) <= position_in_query:
-            return []
-        
-        # Skip empty query elements
-        if len(query[position_in_query]) == 0:
-            return self.find_(query, position_in_query+1)
-        
-        # Return [] if the value has already been computed and returned for this (node, position_in_query)
-        # ie. a query starting by '~' with this node
-        try:
-            if position_in_query in WebPageNode.previous_results["find-~"][self]:
-                return []
-        except KeyError:
-            pass
-
-        nodes_with_tag = list()
-        
-        # Check if we are in a fit-or-fail case
-        # when we are starting with a + or ~ we can't afford to wait next node
-        fit_or_fail = False
-        query_elt = query[position_in_query]
-        if query_elt["tag"] == "+" or query_elt["tag"] == "~" or query_elt["tag"] == ">":
-            # Query starting by '~' with self
-            # For +/> it is not necessary because they are called only on one node
-            if query_elt["tag"] == "~":
-                try:
-                    WebPageNode.previous_results["find-~"][self]
-                except KeyError:
-                    WebPageNode.previous_results["find-~"][self] = list()
-                WebPageNode.previous_results["find-~"][self].append(position_in_query)
-            
-            fit_or_fail = True
-            position_in_query += 1
-            query_elt = query[position_in_query]
-
-            if len(query) <= position_in_query:
-                return []
-        
-        # Does this node fit the requirements for query[position_in_query]?
-        fit = self.is_fit_query(query_elt)
-        sb_is_fit_or_fail = False
-        if fit:
-            if len(query) == position_in_query +1:
-                nodes_with_tag.append(self)
-            elif query[position_in_query +1]["tag"] == "+" or query[position_in_query +1]["tag"] == "~":
-                sb_is_fit_or_fail = True
-        
-        if fit_or_fail:
-            if not fit:
-                return []
-            elif len(query) == position_in_query +1:
-                return [self]
         
-        # Check remaining elements (sisters and brothers)
-        if sb_is_fit_or_fail:
-            if query[position_in_query +1]["tag"] == "+":
-                sb = self.parent_.get_next_child(self)
-                if sb:
-                    nodes_with_tag += sb.find_(query, position_in_query+1)
-            elif query[position_in_query +1]["tag"] == "~":
-                sisters_brothers = self.parent_.get_next_children(self)
-                for sb in sisters_brothers:
-                    nodes_with_tag += sb.find_(query, position_in_query+1)
-
-        # Check remaining elements (children)
-        for node in self.nodes_:
-            if fit:
-                if len(query) == position_in_query +1 or sb_is_fit_or_fail:
-                    nodes_with_tag_n = node.find_(query, position_in_query)
-                else:
-                    nodes_with_tag_n = node.find_(query, position_in_query+1)
-            else:
-                nodes_with_tag_n = node.find_(query, position_in_query)
-            
-            nodes_with_tag += nodes_with_tag_n
-        
-        return nodes_with_tag
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if selector.match(node, self):
+                nodes.append(node)
+            stack.extend(reversed(node.nodes_))
     
     def find(self, query):
         """
-        Return the WebPageNode(s) that fit the query
-        Query is a string (cf. CSS selector)
+        Return the WebPageNode(s) that fit the query (in document order)
+        Query is a string (cf. CSS selector) or a CSSSelector
         """
 
-        if isinstance(query, list):
-            query_elts = query
+        if isinstance(query, CSSSelector):
+            selector = query
         else:
-            query_elts = WebPageNode.css_selector_to_query_elts(query)
+            selector = WebPageNode.compile_selector(query)
 
-        if len(query_elts) == 0:
-            return list()
-        
-        # "Allocate" memory
-        WebPageNode.previous_results["find-~"] = dict()
+        output = list()
+        self.find_(selector, output)
+        return output
 
-        if isinstance(query_elts[0], list): # we have to deal with an union of queries
-            output = list()
-            for q in query_elts:
-                output = list(set(output + self.find_(q)))
-        else:
-            output = list(set(self.find_(query_elts)))
-        
-        # Free allocated memory
-        for k in WebPageNode.previous_results.keys():
-            if k.startswith("find-"):
-                del WebPageNode.previous_results[k]
+    @staticmethod
+    def merge(lists):
+        """
+        Merge lists of WebPageNode(s) sorted in document order
+        Return a list in document order without duplicates
+        """
+
+        if len(lists) == 1:
+            return lists[0]
         
+        output = list()
+        for order, node in heapq.merge(*[[(node.order_, node) for node in nodes] for nodes in lists]):
+            if not output or output[-1] is not node:
+                output.append(node)
         return output
 
     def append_child(self, tag, attrs):
@@ -318,17 +140,157 @@ class WebPageNode:
         """
         
         node = WebPageNode(tag, attrs, self)
-        self.nodes_.append(node)
+        if self.nodes_:
+            node.previous_ = self.nodes_[-1]
+            self.nodes_.append(node)
+        else:
+            self.nodes_ = [node]
         return node
 
+class LxmlTarget:
+    def __init__(self, webpageparser):
+        """
+        Initialise a LxmlTarget object
+
+        Target of lxml's HTMLParser: parsing events are forwarded to the callbacks of webpageparser
+        """
+
+        self.webpageparser_ = webpageparser
+
+    def start(self, tag, attrib):
+        self.webpageparser_.handle_starttag(tag, attrib.items())
+
+    def end(self, tag):
+        self.webpageparser_.handle_endtag(tag)
+
+    def data(self, data):
+        self.webpageparser_.handle_data(data)
+
+    def comment(self, text):
+        self.webpageparser_.handle_comment(text)
+
+    def close(self):
+        return None
+
 class WebPageParser(HTMLParser):
-    def __init__(self):
+    backends = ("python", "lxml")
+    tags_without_text = ("script", "style")
+
+    def __init__(self, queries=None, backend="python"):
+        """
+        Initialise a WebPageParser object
+
+        queries: if specified, the only queries that will be given to find/find_many
+        they are then evaluated while the source code is parsed and no tree is kept (streaming mode)
+        except if one of them requires the siblings of a node (+ or ~ combinators)
+
+        backend: parser reading the source code (cf. get_available_backends)
+        + python: HTMLParser of the standard library
+        + lxml  : libxml2's HTML parser, it fixes the source code as browsers do (implied end tags...)
+        both backends build the same WebPageNode(s) for well-formed source codes
+
+        Raise ValueError if backend is not available
+        """
+
         self.document_roots = list()
         self.stack_roots = list()
 
+        # indexes built during parsing, nodes are kept in document order
+        self.nodes = list()
+        self.nodes_per_tag = dict()
+        self.nodes_per_id = dict()
+        self.nodes_per_class = dict() # class token: nodes
+
+        # tag and attribute names are shared by all the nodes using them
+        self.names_ = dict()
+
+        # streaming mode: only the stack of open nodes and the nodes fitting the queries are kept
+        self.streaming = queries is not None and not WebPageParser.requires_tree(queries)
+        self.num_nodes_ = 0
+        self.results_ = dict() # query: nodes
+        self.queries_per_tag_ = dict() # tag (None for any tag): [(nodes, CSSQuery)]
+        if self.streaming:
+            for query in queries:
+                nodes = list()
+                self.results_[query] = nodes
+                for q in WebPageNode.compile_selector(query).get_queries():
+                    try:
+                        self.queries_per_tag_[q.compounds[-1].tag].append((nodes, q))
+                    except KeyError:
+                        self.queries_per_tag_[q.compounds[-1].tag] = [(nodes, q)]
+
+        # feed can be called with consecutive chunks of the source code
+        # a text split between two chunks is received by two consecutive calls to handle_data
+        self.data_continued = False
+
+        # signature of the visible text of the document, the text itself is not kept (cf. get_text_signature)
+        self.text_signature_ = MinHashBuilder()
+
         HTMLParser.__init__(self)
+
+        if backend not in WebPageParser.get_available_backends():
+            raise ValueError("Parser backend '%s' is not available (available: %s)" % (backend, ", ".join(WebPageParser.get_available_backends())))
+        self.backend = backend
+        self.lxml_parser_ = None
+        if backend == "lxml":
+            self.lxml_parser_ = etree.HTMLParser(target=LxmlTarget(self))
+        self.closed_ = False
+
+    @staticmethod
+    def get_available_backends():
+        if etree is None:
+            return ["python"]
+        return list(WebPageParser.backends)
+
+    def feed(self, data):
+        if self.lxml_parser_ is not None:
+            self.lxml_parser_.feed(data)
+        else:
+            HTMLParser.feed(self, data)
+
+    def close(self):
+        """
+        Signal the end of the source code, it is called by find and find_many
+
+        The lxml backend then parses the data it was still buffering
+        The python backend ignores incomplete constructs at the end of the source code
+        """
+
+        if self.closed_:
+            return
+        self.closed_ = True
+        if self.lxml_parser_ is not None:
+            try:
+                self.lxml_parser_.close()
+            except etree.LxmlError: # eg. empty document
+                pass
     
+    def intern_(self, name):
+        try:
+            return self.names_[name]
+        except KeyError:
+            self.names_[name] = name
+            return name
+
+    @staticmethod
+    def requires_tree(queries):
+        """
+        Return True if one of the queries cannot be evaluated in streaming mode
+        """
+
+        for query in queries:
+            for q in WebPageNode.compile_selector(query).get_queries():
+                if "+" in q.combinators or "~" in q.combinators:
+                    return True
+        return False
+
     def handle_starttag(self, tag, attrs):
+        self.data_continued = False
+        tag = self.intern_(tag)
+        attrs = [(self.intern_(name), value) for name, value in attrs]
+        if self.streaming:
+            self.handle_starttag_streaming_(tag, attrs)
+            return
         try:
             # Add this Node to its parent instance
             child = self.stack_roots[-1].append_child(tag, attrs)
@@ -339,32 +301,226 @@ class WebPageParser(HTMLParser):
         
         # Add the node to the stack
         self.stack_roots.append(child)
+        self.index_(child)
+
+    def handle_starttag_streaming_(self, tag, attrs):
+        """
+        The node is only linked to its parent: ancestors are enough to evaluate the queries
+        """
+
+        try:
+            node = WebPageNode(tag, attrs, self.stack_roots[-1])
+        except IndexError:
+            node = WebPageNode(tag, attrs)
+        node.order_ = self.num_nodes_
+        self.num_nodes_ += 1
+        self.stack_roots.append(node)
+
+        try:
+            candidates = self.queries_per_tag_[tag]
+        except KeyError:
+            candidates = list()
+        try:
+            candidates = candidates + self.queries_per_tag_[None]
+        except KeyError:
+            pass
+        
+        for nodes, q in candidates:
+            if nodes and nodes[-1] is node: # already fits another part of the union
+                continue
+            if q.match(node):
+                nodes.append(node)
+
+    def index_(self, node):
+        """
+        Add node to the indexes of the document
+        """
+
+        node.order_ = len(self.nodes)
+        self.nodes.append(node)
+        
+        try:
+            self.nodes_per_tag[node.tag_].append(node)
+        except KeyError:
+            self.nodes_per_tag[node.tag_] = [node]
+        
+        if not node.attrs_:
+            return
+
+        try:
+            id_value = node.attrs_["id"]
+            if id_value is not None:
+                try:
+                    self.nodes_per_id[id_value].append(node)
+                except KeyError:
+                    self.nodes_per_id[id_value] = [node]
+        except KeyError:
+            pass
+
+        try:
+            class_tokens = node.attrs_["class"].split()
+        except (KeyError, AttributeError):
+            class_tokens = list()
+        for class_token in set(class_tokens):
+            try:
+                self.nodes_per_class[class_token].append(node)
+            except KeyError:
+                self.nodes_per_class[class_token] = [node]
+
+    def get_candidates_(self, compound):
+        """
+        Return the nodes that might fit compound (in document order)
+        using the smallest list of the indexes
+        """
+
+        try:
+            if compound.id is not None:
+                return self.nodes_per_id[compound.id]
+            candidates = self.nodes
+            if compound.tag is not None:
+                candidates = self.nodes_per_tag[compound.tag]
+            for class_name in compound.classes:
+                nodes_with_class = self.nodes_per_class[class_name]
+                if len(nodes_with_class) < len(candidates):
+                    candidates = nodes_with_class
+            return candidates
+        except KeyError: # no node with this tag, id or class
+            return list()
 
     def handle_endtag(self, tag):
+        self.data_continued = False
         # Remove the top of the stack
-        # The stack has at least one element (because handle_endtag cannot be called before handle_starttag)
-        self.stack_roots.pop()
+        # Stray end tags (no open node) are ignored
+        try:
+            node = self.stack_roots.pop()
+        except IndexError:
+            return
+        if self.streaming: # the node does not need its ancestors anymore
+            node.parent_ = None
 
     def handle_data(self, data):
         if len(self.stack_roots) > 0:
-            self.stack_roots[-1].set_data(data)
+            if self.stack_roots[-1].tag_ not in WebPageParser.tags_without_text:
+                if self.data_continued:
+                    self.text_signature_.feed(data)
+                else: # texts of different nodes are separated
+                    self.text_signature_.feed(u" " + data)
+            if self.data_continued and self.stack_roots[-1].get_data():
+                self.stack_roots[-1].set_data(self.stack_roots[-1].get_data() + data)
+            else:
+                self.stack_roots[-1].set_data(data)
+            self.data_continued = True
+
+    def get_text_signature(self, other=None):
+        """
+        Return the MinHash signature of the text of the document, except the content of script and style tags
+        None if it contains less than MinHashIndex.shingle_size words
+
+        other: cf. MinHashBuilder.get_signature
+        """
+
+        return self.text_signature_.get_signature(other)
+
+    def handle_charref(self, name):
+        try:
+            if name.startswith("x") or name.startswith("X"):
+                codepoint = int(name[1:], 16)
+            else:
+                codepoint = int(name)
+            self.handle_data(unichr(codepoint))
+        except (ValueError, OverflowError):
+            self.handle_data(u"&#%s;" % name)
+
+    def handle_entityref(self, name):
+        try:
+            self.handle_data(unichr(name2codepoint[name]))
+        except KeyError:
+            self.handle_data(u"&%s;" % name)
+
+    def handle_comment(self, data):
+        self.data_continued = False
+
+    def handle_decl(self, decl):
+        self.data_continued = False
+
+    def handle_pi(self, data):
+        self.data_continued = False
 
     def find(self, query, source_list=None):
         """
         Return the WebPageNode(s) that fit the query
         """
         
-        query_elts = WebPageNode.css_selector_to_query_elts(query)
+        self.close()
+        if self.streaming:
+            return list(self.get_streaming_result_(query))
+
+        selector = WebPageNode.compile_selector(query)
+        
+        if source_list:
+            result = list()
+            for root_node in source_list:
+                root_node.find_(selector, result)
+            return result
         
-        if not source_list:
-            source_list = self.document_roots
+        # Whole document: start from the candidates given by the indexes
+        # and check their ancestors/siblings
+        results = list()
+        for q in selector.get_queries():
+            result = list()
+            for node in self.get_candidates_(q.compounds[-1]):
+                if q.match(node):
+                    result.append(node)
+            results.append(result)
+        return WebPageNode.merge(results)
+    
+    def find_many(self, queries):
+        """
+        Return a dictionary query: WebPageNode(s) that fit the query (in document order)
+
+        Queries whose rightmost element has a tag, an id or a class start from the candidates of the indexes
+        The other ones are evaluated together during a single traversal of the document
+        """
+
+        self.close()
+        if self.streaming:
+            result = dict()
+            for query in queries:
+                result[query] = list(self.get_streaming_result_(query))
+            return result
+
+        results = dict() # query: one list of nodes per part of the union
+        unindexed = list() # (list of nodes, CSSQuery) for which any node is a candidate
+        for query in queries:
+            results[query] = list()
+            for q in WebPageNode.compile_selector(query).get_queries():
+                nodes = list()
+                results[query].append(nodes)
+                compound = q.compounds[-1]
+                if compound.tag is None and compound.id is None and not compound.classes:
+                    unindexed.append((nodes, q))
+                    continue
+                for node in self.get_candidates_(compound):
+                    if q.match(node):
+                        nodes.append(node)
         
-        result = list()
-        for root_node in source_list:
-            result += root_node.find(query_elts)
+        if unindexed:
+            for node in self.nodes:
+                for nodes, q in unindexed:
+                    if q.match(node):
+                        nodes.append(node)
         
+        result = dict()
+        for query in queries:
+            result[query] = WebPageNode.merge(results[query])
         return result
     
+    def get_streaming_result_(self, query):
+        try:
+            return self.results_[query]
+        except KeyError:
+            raise ValueError("Query '%s' has not been given to WebPageParser before parsing (streaming mode)" % query)
+
     def free_selector(self):
         WebPageNode.free_selector()
 
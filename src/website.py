@@ -1,8 +1,21 @@
+import os
 import re
+import time
 import requests
+from threading import RLock
+from multiprocessing.pool import ThreadPool
 from webpage import WebPage
-from seocheck import SEOCheckExist, SEOCheckNotExist, SEOCheckLength, SEOCheckLengthBetween
+from webpageparser import WebPageParser, WebPageNode
 from seocheckmanager import SEOCheckManager
+from seocheckcolumns import SEOCheckColumns
+from sessionpool import SessionPool
+from hostscheduler import HostScheduler
+from validatorcache import ValidatorCache
+from checkpoint import Checkpoint
+from minhashindex import MinHashIndex
+from fingerprintindex import FingerprintIndex
+from linkgraph import LinkGraph
+from analysispool import AnalysisPool
 from outputprinter import StandardPrinter, PDFPrinter
 from test import Test
 
@@ -12,7 +25,48 @@ def get_key_or_default(dictionary, key, default=None):
     except KeyError:
         return default
 
+def get_crawl_delay(robots_txt):
+    """
+    Return the Crawl-delay (in seconds) that applies to every user-agent (User-agent: *)
+    None if not specified
+    """
+
+    crawl_delay = None
+    user_agents = list()
+    reading_user_agents = False
+    for line in robots_txt.splitlines():
+        line = line.split('#')[0].strip()
+        if ':' not in line:
+            continue
+        
+        field, value = line.split(':', 1)
+        field = field.strip().lower()
+        value = value.strip()
+        if field == "user-agent":
+            if not reading_user_agents:
+                user_agents = list()
+            user_agents.append(value)
+            reading_user_agents = True
+            continue
+        
+        reading_user_agents = False
+        if field == "crawl-delay" and "*" in user_agents:
+            try:
+                crawl_delay = float(value)
+            except ValueError:
+                pass
+    return crawl_delay
+
 class WebSite:
+    # parameters defining the crawl itself
+    # a resumed crawl keeps the values of the checkpoint
+    crawl_parameters = ("nofollow", "noindex", "deep", "num-retry", "max-depth", "single-request", "parser", "checks")
+
+    # maximal number of clicks from the start page (3-click rule)
+    max_clicks = 3
+
+    # SEOChecks applied to every webpage
+    default_checks_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seochecks.json")
     
     def __init__(self, start_url):
         """
@@ -26,37 +80,75 @@ class WebSite:
             raise ValueError("'start_url' must be an URL starting by http:// or https://")
         self.root_url = m.group(0) # has / at the end
 
+        # append/retrieve_webpage can be called by several workers at once
+        self.lock_ = RLock()
+
+        self.reset_()
+        self.load_checks(WebSite.default_checks_path)
+    
+    def load_checks(self, path):
+        """
+        Replace the SEOChecks by the ones described in the JSON file path (cf. SEOCheckManager.load)
+        """
+
         self.seocheckmanager = SEOCheckManager()
-        # HTML
-        self.seocheckmanager.append(SEOCheckExist("html", "lang", "Missing LANG attribute for <HTML/>", "Setting this value can help you to get a better ranking based on the localization of the user who is using a search engine and the subdomain in use for this search engine. Results and positioning in google.com and google.co.uk are not the same"), 2)
-        # HEAD / LINK
-        self.seocheckmanager.append(SEOCheckExist("html > head > link[rel~=icon]", "href", "Missing FAVICON"), 3)
-        # HEAD / TITLE
-        self.seocheckmanager.append(SEOCheckExist("html > head > title", None, "Missing <TITLE/>"), 0)
-        self.seocheckmanager.append(SEOCheckLength("html > head > title", None, ">", 70, "Too long <TITLE/>"), 1)
-        # HEAD / META[description]
-        self.seocheckmanager.append(SEOCheckExist("html > head > meta[name=description]", "content", "Missing META for description"), 0)
-        self.seocheckmanager.append(SEOCheckLength("html > head > meta[name=description]", "content", "<", 50, "Too short META for description"), 1)
-        self.seocheckmanager.append(SEOCheckLength("html > head > meta[name=description]", "content", ">", 160, "Too long META for description"), 1)
-        self.seocheckmanager.append(SEOCheckLengthBetween("html > head > meta[name=description]", "content", 150, 160, "Recommended META for description: between 150 and 160"), 3)
-        # HEAD / META[robots]
-        self.seocheckmanager.append(SEOCheckExist("html > head > meta[name=robots]", "content", "Missing META for robots"), 1)
-        # H1
-        self.seocheckmanager.append(SEOCheckExist("h1", None, "Missing <H1/>"), 0)
-        # IMG
-        self.seocheckmanager.append(SEOCheckNotExist("img", "src", "(.+)", "Missing SRC attribute for <IMG/>", "src attribute should be specified on every <img/>"), 0)
-        self.seocheckmanager.append(SEOCheckNotExist("img", "alt", "(.+)", "Missing ALT attribute for <IMG/>"), 0)
-        self.seocheckmanager.append(SEOCheckLength("img", "alt", ">", 80, "Too long ALT attribute for <IMG/>"), 2)
-        # A
-        self.seocheckmanager.append(SEOCheckNotExist("a", "href", "(.+)", "Missing HREF attribute for <A/>", "<a/> links are used to create hyperlinks. href should be specified on every <a/> link"), 0)
-        self.seocheckmanager.append(SEOCheckNotExist("a[href^='/'] , a[href^='%s']" % self.root_url, None, "(.+)", "Missing visible/anchor text of <A/> (internal link)", "Anchor text of <a/> links is useful because it helps bots to understand what kind of page is targetted. It gives bots keywords that could be attributed to the webpage"), 2)
-        self.seocheckmanager.append(SEOCheckNotExist("a[href='#']", None, None, "Use of <a href='#' />", "For my part, I prefer using <a href='javascript:void(0);' onclick='...' /> instead of <a href='#' onclick='...' />. <a href='#' /> makes the page scrolling up when clicked"), 3)
-        # APPLET / IFRAME
-        self.seocheckmanager.append(SEOCheckNotExist("applet", "code", "(.+)", "Missing CODE attribute for <APPLET/>"), 3)
-        self.seocheckmanager.append(SEOCheckNotExist("iframe", "src", "(.+)", "Missing SRC attribute for <IFRAME/>"), 3)
-        # I / B
-        self.seocheckmanager.append(SEOCheckNotExist("i , b", "class", "(^| )(glyphicon)($| )", "Recommended: use <strong/> and <em/> instead of <i/> and <b/>"), 2)
+        self.seocheckmanager.load(path, {"root_url": self.root_url})
     
+    def reset_(self):
+        """
+        Forget the webpages of a previous scan and the data computed on them
+        """
+
+        # webpages contains the list of known pages
+        # pages that have been or should be seen during scan
+        # for max_depth=+infinity
+        self.webpages = list()
+        
+        # faster lookup
+        self.url_to_id = dict()
+
+        # links and ressources between webpages
+        self.links = LinkGraph()
+        self.ressources = LinkGraph()
+
+        # ids of the webpages per digest of title/description (cf. register_title)
+        self.titles_index_ = FingerprintIndex(lambda webpage_id: self.webpages[webpage_id].extraction["title"])
+        self.descriptions_index_ = FingerprintIndex(lambda webpage_id: self.webpages[webpage_id].extraction["description"])
+
+        # signatures of the content of the webpages (cf. register_minhash)
+        self.minhashindex_ = MinHashIndex()
+    
+    def register_digest_(self, index, digest, webpage):
+        with self.lock_:
+            first_webpage_id = index.add(digest, webpage.id)
+            if first_webpage_id is None:
+                return None
+            return self.webpages[first_webpage_id]
+
+    def register_title(self, digest, webpage):
+        """
+        Return the first webpage whose title had the same digest
+        None if there is no such webpage, webpage is then registered as the first one
+        """
+
+        return self.register_digest_(self.titles_index_, digest, webpage)
+
+    def register_description(self, digest, webpage):
+        """
+        Return the first webpage whose description had the same digest
+        None if there is no such webpage, webpage is then registered as the first one
+        """
+
+        return self.register_digest_(self.descriptions_index_, digest, webpage)
+
+    def register_minhash(self, signature, webpage):
+        """
+        Register the signature of the content of webpage, near-duplicates are reported at the end of the scan
+        """
+
+        with self.lock_:
+            self.minhashindex_.add(signature, webpage)
+
     def append(self, webpage):
         """
         Append a webpage to the list of currently in use WebPages
@@ -64,9 +156,10 @@ class WebSite:
         /!\ Does not check if the page is already in the list
         """
         
-        webpage.id = len(self.webpages)
-        self.webpages.append(webpage)
-        self.url_to_id[webpage.url] = webpage.id
+        with self.lock_:
+            webpage.id = len(self.webpages)
+            self.webpages.append(webpage)
+            self.url_to_id[webpage.url] = webpage.id
 
         return webpage.id
 
@@ -86,25 +179,160 @@ class WebSite:
             without_slashes = from_wp.url.split('?')[0].split('/')
             url = '/'.join(without_slashes[:-1]) + '/' + url
 
-        try:
-            wp_id = self.url_to_id[url]
-        except KeyError:
-            wp = WebPage(url, from_wp.depth +1, extended | url.startswith(self.root_url))
-            wp_id = self.append(wp)
-        
-        wp = self.webpages[wp_id]
-        if as_ressource:
-            wp.add_ressource_used_by(from_wp)
-        else:
-            wp.add_link_used_by(from_wp)
+        with self.lock_:
+            try:
+                wp_id = self.url_to_id[url]
+            except KeyError:
+                wp = WebPage(url, from_wp.depth +1, extended | url.startswith(self.root_url))
+                wp_id = self.append(wp)
+            
+            wp = self.webpages[wp_id]
+            if as_ressource:
+                self.ressources.add_edge(from_wp.id, wp_id)
+            else:
+                self.links.add_edge(from_wp.id, wp_id)
         return wp
     
+    def restore(self, snapshot, nofollow, noindex):
+        """
+        Restore the pages of a crawl saved by Checkpoint
+        Return the position of the BFS cursor
+
+        Relationships between pages and duplicates are rebuilt
+        by applying the extraction of the scanned pages in the order of the crawl
+        """
+
+        self.reset_()
+        for state in snapshot["webpages"]:
+            self.append(WebPage.from_state(state))
+
+        cursor_webpages_pos = snapshot["cursor"]
+        for webpage in self.webpages[:cursor_webpages_pos]:
+            if webpage.extraction:
+                webpage.apply_extraction(webpage.extraction, self, nofollow, noindex)
+
+        return cursor_webpages_pos
+
+    def report_failures(self):
+        """
+        Report the webpages and ressources that are not available to the pages using them
+        """
+
+        sources, targets = self.links.get_edges()
+        for i in range(len(sources)):
+            if self.webpages[targets[i]].is_broken():
+                self.webpages[sources[i]].has_brokenlinks = True
+
+        sources, targets = self.ressources.get_edges()
+        for i in range(len(sources)):
+            if self.webpages[targets[i]].is_broken():
+                self.webpages[sources[i]].has_brokenressources = True
+
+    def analyse_links(self):
+        """
+        Compute click depth, number of inlinks and PageRank of the scanned internal webpages
+        considering the links between them
+
+        Click depths are counted from the start page
+        or from the first webpage of the graph in the order of the crawl if the start page is not part of it (eg. redirection)
+        """
+
+        # only the crawled HTML webpages whose links are known: links towards other webpages are ignored
+        nodes = [webpage.id for webpage in self.webpages if webpage.scanned and webpage.status == 200 and webpage.extraction is not None]
+        if not nodes:
+            print "Internal links not analysed: no HTML webpage crawled with a 200 status (start page: %d)" % self.webpages[0].status
+            return
+        if nodes[0] != 0:
+            print "Start page not analysed (status %d): clicks are counted from %s" % (self.webpages[0].status, self.webpages[nodes[0]].url)
+
+        offsets, targets = self.links.get_csr(nodes)
+        depths = LinkGraph.get_depths(offsets, targets, 0)
+        in_degrees = LinkGraph.get_in_degrees(offsets, targets)
+        ranks = LinkGraph.get_pagerank(offsets, targets)
+        for i in range(len(nodes)):
+            webpage = self.webpages[nodes[i]]
+            webpage.click_depth = depths[i]
+            webpage.num_inlinks = in_degrees[i]
+            webpage.pagerank = ranks[i]
+
+    def count_links(self):
+        """
+        Return (internal, external): number of links of each webpage towards internal and external webpages
+        """
+
+        internal = [0] * len(self.webpages)
+        external = [0] * len(self.webpages)
+        sources, targets = self.links.get_edges()
+        for i in range(len(sources)):
+            if self.webpages[targets[i]].internal:
+                internal[sources[i]] += 1
+            else:
+                external[sources[i]] += 1
+        return (internal, external)
+
+    def crawl_chunk_(self, chunk_webpages, fetch, pool, hostscheduler, analysispool, validatorcache, noindex, nofollow):
+        """
+        Fetch the webpages of chunk_webpages (in parallel if pool is defined) and analyse them in their order
+        """
+
+        if pool:
+            # hosts are interleaved so that workers waiting for a throttled host do not hold back the others
+            positions = hostscheduler.interleave(chunk_webpages)
+            fetched = pool.map(fetch, [chunk_webpages[pos] for pos in positions], 1)
+            webpageparsers = [None] * len(chunk_webpages)
+            for pos, webpageparser in zip(positions, fetched):
+                webpageparsers[pos] = webpageparser
+        else:
+            webpageparsers = map(fetch, chunk_webpages)
+
+        if analysispool:
+            # webpageparsers contains SourceCodeBuffer(s)
+            positions = [pos for pos in range(len(chunk_webpages)) if webpageparsers[pos] is not None]
+            extractions = analysispool.extract([webpageparsers[pos].get_source_code() for pos in positions])
+            for pos, extraction in zip(positions, extractions):
+                chunk_webpages[pos].extraction = extraction
+        
+        for pos in range(len(chunk_webpages)):
+            webpage = chunk_webpages[pos]
+            webpageparser = webpageparsers[pos]
+            webpageparsers[pos] = None # free the parser as soon as it has been analysed
+            
+            if analysispool: # webpage.extraction has been computed by analysispool
+                webpage.analyse(None, self, self.seocheckmanager, noindex, nofollow)
+            else:
+                webpage.analyse(webpageparser, self, self.seocheckmanager, noindex, nofollow)
+            if validatorcache and webpageparser is not None:
+                validatorcache.put(webpage)
+
     def scan(self, parameters):
         """
         Scan the WebSite in order to report abnormal or non-optimal
         coding choices
         """
         
+        # checkpoints of the crawl
+        resume = get_key_or_default(parameters, "resume", False)
+        checkpoint_path = get_key_or_default(parameters, "checkpoint", os.path.join(os.path.dirname(os.path.abspath(__file__)), "../output/checkpoint"))
+        checkpoint_interval = get_key_or_default(parameters, "checkpoint-interval", 60)
+        checkpoint = Checkpoint(checkpoint_path)
+
+        snapshot = None
+        if resume and checkpoint.exists():
+            snapshot = checkpoint.load()
+        if snapshot:
+            if snapshot["start-url"] != self.start_url:
+                raise ValueError("the checkpoint '%s' has been saved for another URL: %s" % (checkpoint_path, snapshot["start-url"]))
+            
+            parameters = dict(parameters)
+            for key in WebSite.crawl_parameters:
+                try:
+                    parameters[key] = snapshot["parameters"][key]
+                except KeyError:
+                    try:
+                        del parameters[key]
+                    except KeyError:
+                        pass
+        
         email_address = get_key_or_default(parameters, "email")
         nofollow = get_key_or_default(parameters, "nofollow", False)
         noindex = get_key_or_default(parameters, "noindex", False)
@@ -112,48 +340,176 @@ class WebSite:
         num_retry = get_key_or_default(parameters, "num-retry", 0)
         max_depth = get_key_or_default(parameters, "max-depth", 5)
         color = get_key_or_default(parameters, "color", False)
+        workers = get_key_or_default(parameters, "workers", 1)
+        pool_size = get_key_or_default(parameters, "pool-size", 10)
+        single_request = get_key_or_default(parameters, "single-request", False)
+        verify_workers = get_key_or_default(parameters, "verify-workers", 16)
+        max_page_size = get_key_or_default(parameters, "max-page-size", 10240)
+        host_rate = get_key_or_default(parameters, "host-rate", 0)
+        host_inflight = get_key_or_default(parameters, "host-inflight", 2)
+        breaker_threshold = get_key_or_default(parameters, "breaker-threshold", 3)
+        cache_directory = get_key_or_default(parameters, "cache")
+        cache_size = get_key_or_default(parameters, "cache-size", 100)
+        parser_backend = get_key_or_default(parameters, "parser", "python")
+        if parser_backend not in WebPageParser.get_available_backends():
+            print "Parser backend '%s' is not available, the python one is used instead" % parser_backend
+            parser_backend = "python"
+        processes = get_key_or_default(parameters, "processes", 1)
+        checks_path = get_key_or_default(parameters, "checks")
+        if checks_path:
+            self.load_checks(checks_path)
 
-        # webpages contains the list of known pages
-        # pages that have been or should be seen during scan
-        # for max_depth=+infinity
-        self.webpages = list()
-        
-        # faster lookup
-        self.url_to_id = dict()
-        
-        self.append(WebPage(self.start_url))
+        self.reset_()
         
         # BFS parameters
         cursor_webpages_pos = 0
-        
-        # while we do not reach the maximal allowed depth or visit everything
-        while cursor_webpages_pos < len(self.webpages) and self.webpages[cursor_webpages_pos].depth <= max_depth:
-            # remove and return the head of the queue
-            webpage = self.webpages[cursor_webpages_pos]
-            webpage.scan(self, self.seocheckmanager, noindex, nofollow, deep, num_retry)
-            
-            cursor_webpages_pos += 1
+
+        if snapshot:
+            cursor_webpages_pos = self.restore(snapshot, nofollow, noindex)
+            print "Resuming crawl: %d pages scanned, %d pages known" % (cursor_webpages_pos, len(self.webpages))
+        else:
+            self.append(WebPage(self.start_url))
+
+        # keep-alive connections shared by every query of the scan
+        sessionpool = SessionPool(pool_size)
+
+        # per-host limits on the queries and circuit breakers
+        hostscheduler = HostScheduler(host_rate, host_inflight, breaker_threshold)
+
+        # validators and extracted data of the previous scans
+        validatorcache = None
+        if cache_directory:
+            validatorcache = ValidatorCache(cache_directory, cache_size * 1024 * 1024, self.seocheckmanager.get_signature() + parser_backend + WebPage.extraction_version)
         
         # TEST
         tests = list()
 
         # Robots.txt / Sitemaps
+        # robots.txt is queried before the crawl in order to respect its Crawl-delay
         
         t_robots = Test("Missing robots.txt", "'robots.txt' file tells search engines whether they can access and therefore crawl parts of your site", 0)
         
         error_robots = False
+        robots_url = self.root_url + "robots.txt"
+        hostscheduler.acquire(robots_url)
         try:
-            robots_webpage = requests.get(self.root_url + "robots.txt", timeout=10)
+            robots_webpage = sessionpool.get(robots_url, timeout=10)
         except requests.ConnectionError:
             error_robots = True
         except requests.exceptions.Timeout:
             error_robots = True
         except requests.exceptions.InvalidSchema:
             error_robots = True
+        finally:
+            hostscheduler.release(robots_url)
         if error_robots or robots_webpage.status_code != 200:
             t_robots.set_passed(False)
+        else:
+            hostscheduler.set_crawl_delay(self.root_url, get_crawl_delay(robots_webpage.text))
 
         tests.append(t_robots)
+        
+        # Pages of a given depth are fetched in parallel
+        # their source code is parsed while it is downloaded, keeping only the nodes required by the analysis
+        # the resulting parsers are then analysed in the order of the BFS queue so that the report stays deterministic
+        # with several processes, source codes are only buffered by the fetches and parsed by the processes of analysispool
+        analysispool = None
+        if processes > 1:
+            analysispool = AnalysisPool(processes, self.seocheckmanager, parser_backend)
+        pool = None
+        if workers > 1:
+            pool = ThreadPool(workers)
+        chunk_size = max(1, workers, processes) * 16
+        last_checkpoint = time.time()
+        unsaved_webpages = list() # webpages scanned since the last checkpoint
+        fetch = lambda webpage: webpage.fetch(sessionpool, hostscheduler, validatorcache, deep, num_retry, single_request, max_page_size * 1024, self.seocheckmanager, parser_backend, analysispool is not None)
+
+        # while we do not reach the maximal allowed depth or visit everything
+        while cursor_webpages_pos < len(self.webpages) and self.webpages[cursor_webpages_pos].depth <= max_depth:
+            # every page of the current depth level is at the head of the queue
+            # pages discovered while analysing them have a greater depth and are appended after them
+            depth = self.webpages[cursor_webpages_pos].depth
+            start_level_pos = cursor_webpages_pos
+            while start_level_pos > 0 and self.webpages[start_level_pos -1].depth == depth: # resumed crawl
+                start_level_pos -= 1
+            end_level_pos = cursor_webpages_pos
+            while end_level_pos < len(self.webpages) and self.webpages[end_level_pos].depth == depth:
+                end_level_pos += 1
+            
+            # pages to crawl are selected before any page of the level is analysed: they do not depend on the size of the chunks
+            # external webpages and ressources are checked later by the verification stage
+            level_webpages = [wp for wp in self.webpages[cursor_webpages_pos:end_level_pos] if wp.needs_crawl(self.links)]
+            
+            # the level is processed by chunks so that checkpoints can be saved in the middle of large levels
+            for chunk_pos in range(0, len(level_webpages), chunk_size):
+                chunk_webpages = level_webpages[chunk_pos:chunk_pos + chunk_size]
+                self.crawl_chunk_(chunk_webpages, fetch, pool, hostscheduler, analysispool, validatorcache, noindex, nofollow)
+                unsaved_webpages += chunk_webpages
+                
+                if chunk_pos + chunk_size < len(level_webpages):
+                    cursor_webpages_pos = level_webpages[chunk_pos + chunk_size].id
+                    if checkpoint_interval > 0 and time.time() - last_checkpoint >= checkpoint_interval:
+                        checkpoint.save(self.start_url, parameters, self.webpages, cursor_webpages_pos, unsaved_webpages)
+                        unsaved_webpages = list()
+                        last_checkpoint = time.time()
+            
+            # pages of the level only linked by pages of the same level (eg. first seen as ressources)
+            # are crawled once the pages linking to them have been analysed
+            level_webpages = [wp for wp in self.webpages[start_level_pos:end_level_pos] if not wp.scanned and wp.needs_crawl(self.links)]
+            while level_webpages:
+                for chunk_pos in range(0, len(level_webpages), chunk_size):
+                    chunk_webpages = level_webpages[chunk_pos:chunk_pos + chunk_size]
+                    self.crawl_chunk_(chunk_webpages, fetch, pool, hostscheduler, analysispool, validatorcache, noindex, nofollow)
+                    unsaved_webpages += chunk_webpages
+                level_webpages = [wp for wp in self.webpages[start_level_pos:end_level_pos] if not wp.scanned and wp.needs_crawl(self.links)]
+            
+            cursor_webpages_pos = end_level_pos
+
+            if checkpoint_interval > 0 and time.time() - last_checkpoint >= checkpoint_interval:
+                checkpoint.save(self.start_url, parameters, self.webpages, cursor_webpages_pos, unsaved_webpages)
+                unsaved_webpages = list()
+                last_checkpoint = time.time()
+        
+        if pool:
+            pool.close()
+            pool.join()
+        if analysispool:
+            analysispool.close()
+
+        # Verification of external webpages and ressources
+        # they only require header queries: they are checked with a higher concurrency
+
+        verified_webpages = [wp for wp in self.webpages if not wp.scanned and wp.depth <= max_depth]
+        verify = lambda webpage: webpage.verify(sessionpool, hostscheduler, deep, num_retry)
+        if verify_workers > 1 and len(verified_webpages) > 1:
+            pool = ThreadPool(verify_workers)
+            positions = hostscheduler.interleave(verified_webpages)
+            pool.map(verify, [verified_webpages[pos] for pos in positions], 1)
+            pool.close()
+            pool.join()
+        else:
+            map(verify, verified_webpages)
+
+        for webpage in verified_webpages:
+            webpage.analyse(None, self, self.seocheckmanager, noindex, nofollow)
+
+        # every webpage is known: failures and internal links can be analysed
+        self.report_failures()
+        self.analyse_links()
+        
+        # the crawl is over
+        checkpoint.remove()
+
+        num_requests, num_connections, num_reused = sessionpool.get_stats()
+        print "HTTP queries: %d, connections opened: %d, connections re-used: %d" % (num_requests, num_connections, num_reused)
+        sessionpool.close()
+
+        if validatorcache:
+            num_hits, num_unchanged, num_misses, num_evictions = validatorcache.get_stats()
+            print "Cache: %d not modified (304), %d unchanged, %d misses, %d evictions" % (num_hits, num_unchanged, num_misses, num_evictions)
+
+        num_hits, num_misses, num_evictions = WebPageNode.selector_cache.get_stats()
+        print "Selector cache: %d hits, %d misses, %d evictions" % (num_hits, num_misses, num_evictions)
 
         # Broken links check
         # Good balance between internal/external links
@@ -163,8 +519,12 @@ class WebSite:
         t_brokenressources_in = Test("Broken ressources in", "Broken ressources (image source, js script, css stylesheets) have been detected in the following webpages", 0)
         t_duplicated_title = Test("Duplicated Title (on pages to be indexed)", "Webpages with identical titles are very harmful for the ranking", 1)
         t_duplicated_description = Test("Duplicated Description (on pages to be indexed)", "Webpages with identical descriptions are very harmul for the ranking", 1)
+        t_near_duplicates = Test("Near-duplicate content (on pages to be indexed)", "Webpages with almost identical content (text, title and description) compete against each other. Merge them or indicate the preferred one with <link rel='canonical' />", 2)
         t_internal_external_links = Test("Too many external links", "Some people believe that the number of external links should be inferior to the number of internal links. Choose your links properly in order to avoid becoming a directory for websites. You can also use rel='nofollow' attribute in order do remove their effects on your ranking", 3)
+        t_click_depth = Test("Webpages deeper than %d clicks (on pages to be indexed)" % WebSite.max_clicks, "Webpages should be reachable from the home page in %d clicks. Deeper webpages are harder to find for users and crawlers, which consider them less important" % WebSite.max_clicks, 2)
+        t_single_inlink = Test("Webpages linked by a single page (on pages to be indexed)", "Internal links spread the ranking of your webpages. Webpages linked by only one other page receive little of it and are found by crawlers through a single path", 3)
 
+        num_links_int, num_links_ext = self.count_links()
         for webpage in self.webpages:
             if webpage.status not in (200, 301, 302):
                 t_brokenlinks.append(webpage)
@@ -176,37 +536,62 @@ class WebSite:
                 t_brokenlinks_in.append(webpage)
             if webpage.has_brokenressources:
                 t_brokenressources_in.append(webpage)
-            if webpage.duplicated_title:
-                t_duplicated_title.append(webpage)
-            if webpage.duplicated_description:
-                t_duplicated_description.append(webpage)
-            if webpage.link_towards_ext and webpage.link_towards_int and len(webpage.link_towards_ext) > len(webpage.link_towards_int):
+            if num_links_int[webpage.id] and num_links_ext[webpage.id] > num_links_int[webpage.id]:
                 t_internal_external_links.append(webpage)
+            if webpage.status == 200 and webpage.click_depth is not None and webpage.click_depth > WebSite.max_clicks:
+                t_click_depth.append(webpage)
+            if webpage.status == 200 and webpage.num_inlinks == 1 and webpage.click_depth != 0:
+                t_single_inlink.append(webpage)
 
         tests.append(t_brokenlinks)
         tests.append(t_brokenlinks_in)
         tests.append(t_brokenressources_in)
+
+        # groups of webpages with identical titles/descriptions
+        for group in self.titles_index_.get_groups():
+            t_duplicated_title.append_group([self.webpages[webpage_id] for webpage_id in group])
+        for group in self.descriptions_index_.get_groups():
+            t_duplicated_description.append_group([self.webpages[webpage_id] for webpage_id in group])
         tests.append(t_duplicated_title)
         tests.append(t_duplicated_description)
+
+        # groups of webpages with almost identical content
+        for cluster in self.minhashindex_.get_clusters():
+            t_near_duplicates.append_group(cluster)
+        tests.append(t_near_duplicates)
         tests.append(t_internal_external_links)
+        tests.append(t_click_depth)
+        tests.append(t_single_inlink)
 
         # SEOCheck - local checks
 
+        checked_webpages = list()
+        for webpage in self.webpages:
+            if noindex and webpage.noindex:
+                continue
+            if not webpage.get_check_dict():
+                continue
+            checked_webpages.append(webpage)
+
+        # Checks are evaluated column-wise when numpy is available
+        if SEOCheckColumns.is_available():
+            seocheckcolumns = SEOCheckColumns(checked_webpages)
+        else:
+            seocheckcolumns = None
+
         seochecks_and_levels = self.seocheckmanager.get_check_list()
         for check_and_level in seochecks_and_levels:
             check = check_and_level[0]
             level = check_and_level[1]
 
             t_check = Test(check.get_title(), check.get_description(), level)
-            for webpage in self.webpages:
-                if noindex and webpage.noindex:
-                    continue
-
-                check_dict = webpage.get_check_dict()
-                if not check_dict:
-                    continue
-                if not check.check(check_dict):
-                    t_check.append(webpage)
+            failing_webpages = None
+            if seocheckcolumns:
+                failing_webpages = seocheckcolumns.get_failing_webpages(check)
+            if failing_webpages is None:
+                failing_webpages = [webpage for webpage in checked_webpages if not check.check(webpage.get_check_dict())]
+            for webpage in failing_webpages:
+                t_check.append(webpage)
             tests.append(t_check)
 
         # Display results
@@ -0,0 +1,289 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import re
+import time
+from webpageparser import WebPageParser
+from website import WebSite
+from webpage import WebPage
+
+def synthetic_page(num_blocks):
+    """
+    Return the source code of a page made of num_blocks blocks of content
+    """
+
+    blocks = list()
+    for i in range(num_blocks):
+        blocks.append(u"""<div class="block b%d" id="block-%d">
+    <h2>Block %d</h2>
+    <p>Some <b>text</b> with <a href="/page-%d.html">an internal link</a> and <a href="http://example.org/%d">an external one</a>.</p>
+    <img src="/img/%d.png" alt="image %d" />
+    <ul><li><i class="glyphicon glyphicon-ok"></i> item</li><li><a href="#">top</a></li></ul>
+</div>""" % (i, i, i, i, i, i, i))
+    return u"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <title>Benchmark page</title>
+    <meta name="description" content="A synthetic page used to benchmark the selectors of SEO Helper" />
+    <meta name="robots" content="index, follow" />
+    <link rel="icon" href="/favicon.ico" />
+    <script src="/main.js"></script>
+</head>
+<body>
+    <h1>Benchmark</h1>
+    %s
+    <iframe src="/frame.html"></iframe>
+</body>
+</html>""" % u"\n".join(blocks)
+
+def timeit(label, func, repeat):
+    start = time.time()
+    for i in range(repeat):
+        func()
+    elapsed = time.time() - start
+    print "%-60s %8.2f ms" % (label, 1000. * elapsed / repeat)
+
+# Selectors of the SEOChecks loaded from seochecks.json (cf. WebSite.load_checks)
+website = WebSite("http://example.com/")
+selectors = website.seocheckmanager.get_css_selectors()
+
+print "Selectors: %d" % len(selectors)
+
+wp = WebPageParser()
+wp.feed(synthetic_page(200))
+
+def find_all_selectors():
+    for css_selector in selectors:
+        wp.find(css_selector)
+
+timeit("find (%d selectors, 200 blocks)" % len(selectors), find_all_selectors, 10)
+
+# Data extracted from a page: SEOChecks, ressources, links and head metadata
+webpage = WebPage("http://example.com/")
+
+def extract():
+    webpage.extract(wp, website.seocheckmanager)
+
+timeit("extract (200 blocks)", extract, 10)
+
+# Lookups with few matches on a big page
+wp_big = WebPageParser()
+wp_big.feed(synthetic_page(2000))
+
+for css_selector in ("h1", "#block-1000", ".b1000 img", "html > head > title"):
+    timeit("find '%s' (2000 blocks)" % css_selector, lambda: wp_big.find(css_selector), 10)
+
+# Result collection on a page with 10k anchors
+wp_anchors = WebPageParser()
+wp_anchors.feed(u"<html><body>%s</body></html>" % u"".join([u'<p><a href="/%d.html">%d</a></p>' % (i, i) for i in range(10000)]))
+
+union = " , ".join(["a[href^='/%d']" % i for i in range(1, 10)])
+for label, css_selector in (("a", "a"), ("union of 9 a[href^=...]", union)):
+    timeit("find %s (10k anchors, tree)" % label, lambda: wp_anchors.find(css_selector, wp_anchors.document_roots), 3)
+    timeit("find %s (10k anchors, indexes)" % label, lambda: wp_anchors.find(css_selector), 3)
+
+# Memory used by the tree
+# tracemalloc is not available for python 2: sizes of the objects owned by the nodes are summed up
+# (node, its __dict__ if any, attributes dictionary, list of children, tag and attribute names)
+# each object is counted once even if it is shared by several nodes
+def tree_footprint(webpageparser):
+    seen = set()
+    size = 0
+    for node in webpageparser.nodes:
+        objects = [node, node.attrs_, node.nodes_, node.tag_]
+        try:
+            objects.append(node.__dict__)
+        except AttributeError:
+            pass
+        if node.attrs_:
+            objects += node.attrs_.keys()
+        for obj in objects:
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                size += sys.getsizeof(obj)
+    return size
+
+print "%-60s %8.1f bytes" % ("memory per node (2000 blocks, %d nodes)" % len(wp_big.nodes), 1. * tree_footprint(wp_big) / len(wp_big.nodes))
+
+# Streaming mode: nodes kept once the page has been parsed
+import gc
+from webpageparser import WebPageNode
+
+def count_nodes():
+    gc.collect()
+    return len([obj for obj in gc.get_objects() if isinstance(obj, WebPageNode)])
+
+del wp, wp_big, wp_anchors
+for num_blocks in (200, 2000):
+    source_code = synthetic_page(num_blocks)
+    for label, queries in (("tree", None), ("streaming", WebPage.get_selectors(website.seocheckmanager))):
+        num_nodes_before = count_nodes()
+        parser = WebPageParser(queries)
+        parser.feed(source_code)
+        print "%-60s %8d" % ("nodes kept, %s (%d blocks)" % (label, num_blocks), count_nodes() - num_nodes_before)
+        del parser
+
+        def parse_and_extract():
+            parser = WebPageParser(queries)
+            parser.feed(source_code)
+            webpage.extract(parser, website.seocheckmanager)
+        timeit("parse + extract, %s (%d blocks)" % (label, num_blocks), parse_and_extract, 3)
+
+# Throughput of the parser backends
+source_code = synthetic_page(2000)
+for backend in WebPageParser.get_available_backends():
+    for label, queries in (("tree", None), ("streaming", WebPage.get_selectors(website.seocheckmanager))):
+        start = time.time()
+        for i in range(3):
+            parser = WebPageParser(queries, backend)
+            parser.feed(source_code)
+            parser.close()
+        elapsed = (time.time() - start) / 3
+        print "%-60s %8.2f Mo/s" % ("parse, %s backend, %s (2000 blocks)" % (backend, label), len(source_code.encode('utf-8')) / elapsed / 1024 / 1024)
+
+# Parsing and extraction in several processes
+import multiprocessing
+from analysispool import AnalysisPool, extract_source_code, init_worker
+
+source_codes = [synthetic_page(200)] * 32
+print "%-60s %8d" % ("cores", multiprocessing.cpu_count())
+
+init_worker(website.seocheckmanager, "python")
+start = time.time()
+map(extract_source_code, source_codes)
+print "%-60s %8.1f pages/s" % ("analysis in the crawler process", len(source_codes) / (time.time() - start))
+
+for processes in (2, 4):
+    analysispool = AnalysisPool(processes, website.seocheckmanager)
+    start = time.time()
+    analysispool.extract(source_codes)
+    print "%-60s %8.1f pages/s" % ("analysis pool, %d processes" % processes, len(source_codes) / (time.time() - start))
+    analysispool.close()
+
+# SEOChecks evaluated page by page or column-wise
+from seocheckcolumns import SEOCheckColumns
+
+parser = WebPageParser()
+parser.feed(synthetic_page(20))
+check_dict = website.seocheckmanager.generate_webpage_check_dict(parser)
+webpages = list()
+for i in range(20000):
+    webpage = WebPage("http://example.com/%d.html" % i)
+    webpage.check_dict = check_dict
+    webpages.append(webpage)
+
+vectorized_checks = [check for check, level in website.seocheckmanager.get_check_list() if hasattr(check, "check_column")]
+
+def check_per_webpage():
+    for check in vectorized_checks:
+        [webpage for webpage in webpages if not check.check(webpage.get_check_dict())]
+
+def check_column_wise():
+    seocheckcolumns = SEOCheckColumns(webpages)
+    for check in vectorized_checks:
+        seocheckcolumns.get_failing_webpages(check)
+
+timeit("%d vectorized SEOChecks per webpage (20000 webpages)" % len(vectorized_checks), check_per_webpage, 3)
+if SEOCheckColumns.is_available():
+    timeit("%d vectorized SEOChecks column-wise (20000 webpages)" % len(vectorized_checks), check_column_wise, 3)
+
+# Near-duplicates: signatures and LSH index
+from minhashindex import MinHashIndex
+
+text = re.sub(r'<[^>]*>', ' ', synthetic_page(200))
+timeit("MinHash signature (200 blocks, %d words)" % len(text.split()), lambda: MinHashIndex.signature(text), 10)
+
+import random
+random.seed(0)
+for num_items in (10000, 100000):
+    # signatures of groups of 5 near-duplicates (a few values differ)
+    signatures = list()
+    while len(signatures) < num_items:
+        signature = [random.getrandbits(32) for i in range(MinHashIndex.num_hashes)]
+        for j in range(5):
+            near = list(signature)
+            near[random.randrange(len(near))] = random.getrandbits(32)
+            signatures.append(tuple(near))
+
+    start = time.time()
+    index = MinHashIndex()
+    for i in range(num_items):
+        index.add(signatures[i], i)
+    clusters = index.get_clusters()
+    print "%-60s %8.2f ms" % ("near-duplicate clusters (%d pages, %d clusters)" % (num_items, len(clusters)), 1000. * (time.time() - start))
+del signatures, index, clusters
+
+# Duplicated titles: index of 64-bit fingerprints
+from hashlib import sha512
+from fingerprintindex import FingerprintIndex
+
+def register_in_keys(seen, digest, item):
+    # registration used before FingerprintIndex
+    if digest in seen.keys():
+        return seen[digest]
+    seen[digest] = item
+    return None
+
+gc.disable() # the objects of the previous benchmarks make collections slow
+for num_items in (5000, 20000):
+    digests = [sha512("title %d" % (i % (num_items * 9 // 10))).digest() for i in range(num_items)] # 10% of duplicates
+    seen = dict()
+    start = time.time()
+    for i in range(num_items):
+        register_in_keys(seen, digests[i], i)
+    print "%-60s %8.2f ms" % ("duplicates, 'in dict.keys()' (%d pages)" % num_items, 1000. * (time.time() - start))
+    start = time.time()
+    index = FingerprintIndex(lambda item_id: digests[item_id])
+    for i in range(num_items):
+        index.add(digests[i], i)
+    print "%-60s %8.2f ms" % ("duplicates, FingerprintIndex (%d pages)" % num_items, 1000. * (time.time() - start))
+gc.enable()
+
+# Memory used per page (sizes of the dictionary and of the objects it owns)
+num_items = 1000000
+digests = [sha512("title %d" % (i % (num_items * 9 // 10))).digest() for i in range(num_items)]
+seen = dict()
+for i in range(num_items):
+    seen.setdefault(digests[i], i)
+size = sys.getsizeof(seen) + sum([sys.getsizeof(digest) for digest in seen])
+print "%-60s %8.1f bytes" % ("duplicates, dict of digests (%d pages)" % num_items, 1. * size / num_items)
+del seen
+
+index = FingerprintIndex(lambda item_id: digests[item_id])
+for i in range(num_items):
+    index.add(digests[i], i)
+size = sys.getsizeof(index.entries_)
+for fingerprint, entry in index.entries_.items():
+    size += sys.getsizeof(fingerprint)
+    if isinstance(entry, list):
+        size += sys.getsizeof(entry) + sum([sys.getsizeof(group) for group in entry])
+print "%-60s %8.1f bytes" % ("duplicates, FingerprintIndex (%d pages)" % num_items, 1. * size / num_items)
+del digests, index
+
+# Link graph: memory per link and analysis of the internal links
+from linkgraph import LinkGraph
+
+random.seed(0)
+num_nodes = 100000
+edges = [(i, random.randint(0, min(num_nodes - 1, 2 * i + 50))) for i in range(num_nodes) for j in range(10)]
+used_by = [list() for i in range(num_nodes)] # reverse links kept per webpage before LinkGraph
+for source, target in edges:
+    used_by[target].append(source)
+size = sys.getsizeof(used_by) + sum([sys.getsizeof(sources) for sources in used_by])
+print "%-60s %8.1f bytes" % ("links, lists of webpages (%d links)" % len(edges), 1. * size / len(edges))
+del used_by
+
+graph = LinkGraph()
+for source, target in edges:
+    graph.add_edge(source, target)
+sources, targets = graph.get_edges()
+size = sys.getsizeof(sources) + sys.getsizeof(targets) + sys.getsizeof(graph.in_degrees_)
+print "%-60s %8.1f bytes" % ("links, LinkGraph (%d links)" % len(edges), 1. * size / len(edges))
+
+nodes = range(num_nodes)
+timeit("CSR adjacency (%d nodes, %d links)" % (num_nodes, len(edges)), lambda: graph.get_csr(nodes), 1)
+offsets, targets = graph.get_csr(nodes)
+timeit("click depths (%d nodes)" % num_nodes, lambda: LinkGraph.get_depths(offsets, targets, 0), 3)
+timeit("PageRank (%d nodes)" % num_nodes, lambda: LinkGraph.get_pagerank(offsets, targets), 1)
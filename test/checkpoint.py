@@ -0,0 +1,65 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import os
+import tempfile
+from webpage import WebPage
+from checkpoint import Checkpoint
+
+path = os.path.join(tempfile.mkdtemp(), "checkpoint")
+parameters = {"max-depth": 3}
+
+webpages = list()
+def discover(num_webpages):
+    for i in range(num_webpages):
+        webpage = WebPage("http://example.com/%d.html" % len(webpages), 1)
+        webpage.id = len(webpages)
+        webpages.append(webpage)
+
+def scan(webpage_id):
+    webpages[webpage_id].scanned = True
+    webpages[webpage_id].status = 200
+    webpages[webpage_id].extraction = {"links": [("/%d.html" % webpage_id, False)]}
+    return webpages[webpage_id]
+
+def check_load(label, cursor):
+    print "Check %s" % label
+    snapshot = Checkpoint(path).load()
+    if snapshot["start-url"] != "http://example.com/" or snapshot["parameters"] != parameters:
+        print "> Unexpected crawl - %s %s" % (snapshot["start-url"], repr(snapshot["parameters"]))
+    if snapshot["cursor"] != cursor:
+        print "> Unexpected cursor - %d instead of %d" % (snapshot["cursor"], cursor)
+    if snapshot["webpages"] != [webpage.get_state() for webpage in webpages]:
+        print "> Unexpected webpages - %s" % repr(snapshot["webpages"])
+
+# Each save appends the pages discovered or scanned since the previous one
+checkpoint = Checkpoint(path)
+discover(3)
+checkpoint.save("http://example.com/", parameters, webpages, 0, [])
+discover(2)
+checkpoint.save("http://example.com/", parameters, webpages, 2, [scan(0), scan(1)])
+checkpoint.save("http://example.com/", parameters, webpages, 5, [scan(2), scan(3), scan(4)])
+checkpoint.wait()
+check_load("saved crawl", 5)
+
+# A record partially written is ignored
+size = os.path.getsize(path)
+with open(path, "ab") as f:
+    f.write("\xff\x00\x00\x00partial")
+check_load("saved crawl followed by a partial record", 5)
+if os.path.getsize(path) != size:
+    print "> Partial record not removed"
+
+# Saves following a load are appended to the loaded crawl
+checkpoint = Checkpoint(path)
+checkpoint.load()
+discover(1)
+checkpoint.save("http://example.com/", parameters, webpages, 6, [scan(5)])
+checkpoint.wait()
+check_load("resumed crawl", 6)
+
+checkpoint.remove()
+if checkpoint.exists():
+    print "> Checkpoint not removed"
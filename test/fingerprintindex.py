@@ -0,0 +1,27 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+from fingerprintindex import FingerprintIndex
+
+values = ["title a", "title b", "title a", "title c", "title b", "title a"]
+
+def check_index(label):
+    print "Check %s" % label
+    index = FingerprintIndex(lambda item_id: values[item_id])
+    expected_first = [None, None, 0, None, 1, 0]
+    for item_id in range(len(values)):
+        first = index.add(values[item_id], item_id)
+        if first != expected_first[item_id]:
+            print "> Unexpected first item for %d - %s instead of %s" % (item_id, repr(first), repr(expected_first[item_id]))
+    if index.get_groups() != [[0, 2, 5], [1, 4]]:
+        print "> Unexpected groups - %s" % repr(index.get_groups())
+
+check_index("groups")
+
+# Every value has the same fingerprint: values themselves are compared
+fingerprint = FingerprintIndex.fingerprint
+FingerprintIndex.fingerprint = staticmethod(lambda value: 0)
+check_index("groups (colliding fingerprints)")
+FingerprintIndex.fingerprint = fingerprint
@@ -0,0 +1,48 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import linkgraph
+from linkgraph import LinkGraph
+
+# ids 0..6, id 4 is not part of the analysed subgraph (eg. external webpage)
+graph = LinkGraph()
+for source, target in [(0, 1), (0, 2), (0, 1), (1, 3), (2, 3), (3, 5), (5, 0), (2, 4), (4, 6), (1, 1)]:
+    graph.add_edge(source, target)
+nodes = [0, 1, 2, 3, 5, 6]
+
+print "Check in-degree of ids"
+if [graph.get_in_degree(node) for node in range(8)] != [1, 3, 1, 2, 1, 1, 1, 0]:
+    print "> Unexpected in-degrees - %s" % repr([graph.get_in_degree(node) for node in range(8)])
+
+print "Check CSR adjacency"
+offsets, targets = graph.get_csr(nodes)
+if list(offsets) != [0, 2, 4, 5, 6, 7, 7] or list(targets) != [1, 2, 1, 3, 3, 4, 0]:
+    print "> Unexpected adjacency - %s %s" % (repr(list(offsets)), repr(list(targets)))
+
+print "Check in-degrees"
+if LinkGraph.get_in_degrees(offsets, targets) != [1, 2, 1, 2, 1, 0]:
+    print "> Unexpected in-degrees - %s" % repr(LinkGraph.get_in_degrees(offsets, targets))
+
+print "Check click depths"
+if LinkGraph.get_depths(offsets, targets, 0) != [0, 1, 1, 2, 3, None]:
+    print "> Unexpected depths - %s" % repr(LinkGraph.get_depths(offsets, targets, 0))
+
+def check_pagerank(label):
+    print "Check PageRank (%s)" % label
+    ranks = LinkGraph.get_pagerank(offsets, targets)
+    if abs(sum(ranks) - 1.) > 1e-6:
+        print "> Sum of the ranks - %f" % sum(ranks)
+    if not ranks[3] > ranks[2] > ranks[5]:
+        print "> Unexpected order - %s" % repr(ranks)
+    return ranks
+
+ranks = check_pagerank("numpy" if linkgraph.numpy is not None else "python")
+if linkgraph.numpy is not None:
+    numpy = linkgraph.numpy
+    linkgraph.numpy = None
+    python_ranks = check_pagerank("python")
+    linkgraph.numpy = numpy
+    if max([abs(ranks[i] - python_ranks[i]) for i in range(len(ranks))]) > 1e-6:
+        print "> Different ranks - %s instead of %s" % (repr(python_ranks), repr(ranks))
@@ -0,0 +1,70 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import random
+from minhashindex import MinHashIndex, MinHashBuilder
+
+random.seed(0)
+vocabulary = ["word%d" % i for i in range(3000)]
+
+def random_words(num_words):
+    return [random.choice(vocabulary) for i in range(num_words)]
+
+def modified(words, num_changes):
+    words = list(words)
+    for i in range(num_changes):
+        words[random.randrange(len(words))] = random.choice(vocabulary)
+    return words
+
+print "Check signature"
+if MinHashIndex.signature(u"two words") is not None:
+    print "> Signature of a text shorter than a shingle"
+text = u" ".join(random_words(400))
+if MinHashIndex.signature(text) != MinHashIndex.signature(text.upper()):
+    print "> Signature depends on the case"
+if len(MinHashIndex.signature(text)) != MinHashIndex.num_hashes:
+    print "> Unexpected length - %d instead of %d" % (len(MinHashIndex.signature(text)), MinHashIndex.num_hashes)
+if None in MinHashIndex.signature(u"a text of five words"):
+    print "> Empty values in the signature of a short text - %s" % repr(MinHashIndex.signature(u"a text of five words"))
+
+print "Check signature of a text received by parts"
+builder = MinHashBuilder()
+pos = 0
+while pos < len(text):
+    size = random.randint(0, 20)
+    builder.feed(text[pos:pos+size])
+    pos += size
+if builder.get_signature() != MinHashIndex.signature(text):
+    print "> Unexpected signature"
+if builder.get_signature() != builder.get_signature():
+    print "> get_signature modified the builder"
+words = random_words(200)
+first_half = MinHashBuilder()
+first_half.feed(u" ".join(words[:100]))
+second_half = MinHashBuilder()
+second_half.feed(u" ".join(words[100:]))
+if MinHashIndex.similarity(first_half.get_signature(second_half), MinHashIndex.signature(u" ".join(words))) < 0.8:
+    print "> Signature of two texts far from the signature of the whole text"
+
+print "Check similarity"
+words = random_words(400)
+similar = MinHashIndex.similarity(MinHashIndex.signature(u" ".join(words)), MinHashIndex.signature(u" ".join(modified(words, 1))))
+if similar < 0.8:
+    print "> Low similarity for near-duplicates - %f" % similar
+different = MinHashIndex.similarity(MinHashIndex.signature(u" ".join(words)), MinHashIndex.signature(u" ".join(random_words(400))))
+if different > 0.2:
+    print "> High similarity for different texts - %f" % different
+
+print "Check clusters"
+index = MinHashIndex()
+words_a = random_words(400)
+words_b = random_words(400)
+texts = [words_a, random_words(400), modified(words_b, 1), modified(words_a, 1), words_b, random_words(400), words_a]
+for i in range(len(texts)):
+    index.add(MinHashIndex.signature(u" ".join(texts[i])), i)
+if index.get_clusters() != [[0, 3, 6], [2, 4]]:
+    print "> Unexpected clusters - %s instead of %s" % (repr(index.get_clusters()), repr([[0, 3, 6], [2, 4]]))
+if MinHashIndex().get_clusters() != []:
+    print "> Unexpected clusters for an empty index"
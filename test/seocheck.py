@@ -0,0 +1,93 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import os
+import random
+import tempfile
+from seocheck import SEOCheckExist, SEOCheckNotExist, SEOCheckLength, SEOCheckLengthBetween
+from seocheckmanager import SEOCheckManager
+from seocheckcolumns import SEOCheckColumns
+from webpage import WebPage
+
+checks = [
+    SEOCheckExist("title", None, "", ""),
+    SEOCheckExist("img", "alt", "", ""),
+    SEOCheckNotExist("img", "alt", "(.+)", "", ""),
+    SEOCheckNotExist("img", "src", None, "", ""),
+    SEOCheckLength("title", None, "<", 10, "", ""),
+    SEOCheckLength("title", None, ">", 70, "", ""),
+    SEOCheckLength("img", "alt", "=", 5, "", ""),
+    SEOCheckLength("img", "alt", ">", 9, "", ""),
+    SEOCheckLengthBetween("title", None, 10, 70, "", ""),
+    SEOCheckLengthBetween("img", "alt", 1, 3, "", ""),
+]
+
+seocheckmanager = SEOCheckManager()
+for check in checks:
+    seocheckmanager.append(check)
+
+print "Check execution plan"
+if seocheckmanager.get_css_selectors() != ["title", "img"]:
+    print "> Unexpected selectors: %s" % repr(seocheckmanager.get_css_selectors())
+if seocheckmanager.get_plan() != [("title", None, False), ("img", "alt", True), ("img", "src", False)]:
+    print "> Unexpected plan: %s" % repr(seocheckmanager.get_plan())
+if [check.get_slot() for check in checks] != [0, 1, 1, 2, 0, 0, 1, 1, 0, 1] or not checks[1].is_slot_raw():
+    print "> Unexpected slots"
+
+def random_measures(raw):
+    measures = list()
+    for i in range(random.choice([0, 0, 1, 1, 2, 5])):
+        length = random.choice([None, 1, 2, 3, 5, 10, 11, 69, 70, 71, 200])
+        if raw and length:
+            measures.append("x" * length)
+        else:
+            measures.append(length)
+    return measures
+
+random.seed(0)
+webpages = list()
+for i in range(500):
+    webpage = WebPage("http://example.com/%d.html" % i)
+    webpage.check_dict = [random_measures(raw) for css_selector, attr, raw in seocheckmanager.get_plan()]
+    webpages.append(webpage)
+
+print "Check load"
+checks_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
+checks_file.write("""[
+    {"type": "exist", "selector": "html > head > title", "title": "Missing <TITLE/>", "level": 0},
+    {"type": "length", "selector": "img", "attr": "alt", "operator": ">", "length": 80, "title": "Too long ALT"},
+    {"type": "not-exist", "selector": "a[href^='{root_url}']", "pattern": "(.+)", "title": "Missing anchor text", "description": "..."}
+]""")
+checks_file.close()
+loaded = SEOCheckManager()
+loaded.load(checks_file.name, {"root_url": "http://example.com/"})
+if [(check.__class__.__name__, level) for check, level in loaded.get_check_list()] != [("SEOCheckExist", 0), ("SEOCheckLength", 2), ("SEOCheckNotExist", 2)]:
+    print "> Unexpected checks"
+if loaded.get_plan() != [("html > head > title", None, False), ("img", "alt", False), ("a[href^='http://example.com/']", None, True)]:
+    print "> Unexpected plan: %s" % repr(loaded.get_plan())
+
+with open(checks_file.name, "w") as f:
+    f.write('[{"type": "exists", "selector": "h1", "title": "Missing <H1/>"}]')
+try:
+    SEOCheckManager().load(checks_file.name)
+    print "> Unknown type of check accepted"
+except ValueError:
+    pass
+os.remove(checks_file.name)
+
+if not SEOCheckColumns.is_available():
+    print "Check column-wise evaluation (skipped: numpy not available)"
+    sys.exit(0)
+
+seocheckcolumns = SEOCheckColumns(webpages)
+for check in checks:
+    print "Check column-wise evaluation of %s(%s, %s)" % (check.__class__.__name__, check.get_css_selector(), check.get_attr_name())
+    expected = [webpage for webpage in webpages if not check.check(webpage.get_check_dict())]
+    result = seocheckcolumns.get_failing_webpages(check)
+    if result is None:
+        if not isinstance(check, SEOCheckNotExist):
+            print "> no column-wise evaluation"
+    elif result != expected:
+        print "> %d failing webpages instead of %d" % (len(result), len(expected))
@@ -12,7 +12,7 @@ htmlpage = """<html>
     <meta name="description" content="Test WebPageParser" />
     <meta name="keywords" content="keyword test page" />
 </head>
-<body>
+<body class="page home">
     <div class="header">
         <img src="/logo.png" alt="logo" />
         <h1>Test Page</h1>
@@ -49,12 +49,19 @@ check_list = [
     ("a[href=#]", None, "link", 1),
     ("a[href=\"#\"]", None, "link", 1),
     ("a[href='#']", None, "link", 1),
+    ("img[src='/logo.png']", "alt", "logo", 1),
+    ("span[data-whoiam='I am a span']", None, None, 1),
+    ("[class~=page]", None, None, 1),
+    ("[class~=pag]", None, None, 0),
 # Class/ID
     ("#elt-1", None, None, 1),
     ("div#elt-2", None, None, 1),
     ("div #elt-1", None, None, 1),
     (".footer", None, None, 1),
     ("div.header", None, None, 1),
+    ("body.home", None, None, 1),
+    (".page.home", None, None, 1),
+    (".page.footer", None, None, 0),
     ("html * .container *", None, None, 4),
 # Wildcard
     (".header *", None, None, 2),
@@ -80,6 +87,9 @@ check_list = [
     ("html > head > .container > span", None, None, 0),
     ("html > body > * > div", "class", "elt", 3),
     ("html > * > * > span", "data-whoiam", "I am a span", 1),
+    ("* > span", "data-whoiam", "I am a span", 1),
+    (".container>div", "class", "elt", 3),
+    ("img+h1", None, "Test Page", 1),
 ]
 
 wp = WebPageParser()
@@ -104,3 +114,114 @@ for check in check_list:
     if len(result_list) != check[3]:
         print "> Unexpected number of elements - %d instead of %d" % (len(result_list), check[3])
 
+
+# find_many evaluates every query during a single traversal
+print "Check find_many"
+result_dict = wp.find_many([check[0] for check in check_list])
+for check in check_list:
+    if sorted(result_dict[check[0]]) != sorted(wp.find(check[0])):
+        print "> Unexpected result for '%s' - %d elements instead of %d" % (check[0], len(result_dict[check[0]]), len(wp.find(check[0])))
+
+# find on the whole document starts from the indexes, it must agree with a traversal of the tree
+print "Check indexes"
+for check in check_list:
+    if sorted(wp.find(check[0])) != sorted(wp.find(check[0], wp.document_roots)):
+        print "> Unexpected result for '%s'" % check[0]
+
+# Results are given in document order, without duplicates
+print "Check document order"
+for check in check_list:
+    for result_list in (wp.find(check[0]), wp.find(check[0], wp.document_roots), result_dict[check[0]]):
+        orders = [res.get_order() for res in result_list]
+        if orders != sorted(set(orders)):
+            print "> Unexpected order for '%s' - %s" % (check[0], orders)
+
+# Streaming mode: queries are evaluated while parsing, no tree is kept
+print "Check streaming mode"
+streaming_queries = [check[0] for check in check_list if not WebPageParser.requires_tree([check[0]])]
+wp_streaming = WebPageParser(streaming_queries)
+wp_streaming.feed(htmlpage)
+if not wp_streaming.streaming or len(wp_streaming.nodes) != 0:
+    print "> Streaming mode has not been used"
+for query in streaming_queries:
+    expected = [(res.get_tag(), res.get_attrs(), res.get_data()) for res in wp.find(query)]
+    result = [(res.get_tag(), res.get_attrs(), res.get_data()) for res in wp_streaming.find(query)]
+    if result != expected:
+        print "> Unexpected result for '%s' - %d elements instead of %d" % (query, len(result), len(expected))
+
+if WebPageParser(["div", "img + h1"]).streaming:
+    print "> Streaming mode should not be used with sibling selectors"
+
+# Stray end tags are ignored
+print "Check stray end tag"
+wp_stray = WebPageParser()
+wp_stray.feed("</p><p>text</p></div>")
+if len(wp_stray.find("p")) != 1:
+    print "> Unexpected number of elements - %d instead of 1" % len(wp_stray.find("p"))
+
+# Character and entity references are part of the data
+print "Check references"
+wp_references = WebPageParser()
+wp_references.feed("<html><head><title>A &amp; B &#233;t&#xe9; &unknown;</title></head></html>")
+if wp_references.find("title")[0].get_data() != u"A & B \xe9t\xe9 &unknown;":
+    print "> Unexpected value - '%s' instead of '%s'" % (repr(wp_references.find("title")[0].get_data()), repr(u"A & B \xe9t\xe9 &unknown;"))
+
+# Visible text of the document
+from minhashindex import MinHashIndex
+print "Check text"
+text_page = u"<html><head><title>Title</title><style>p {}</style><script>var a;</script></head><body><ul><li>a</li><li>caf&eacute; b</li></ul></body></html>"
+wp_text = WebPageParser()
+wp_text.feed(text_page)
+if wp_text.get_text_signature() != MinHashIndex.signature(u"Title a caf\xe9 b"):
+    print "> Unexpected text signature"
+wp_text = WebPageParser()
+for pos in range(len(text_page)): # words split between chunks
+    wp_text.feed(text_page[pos])
+if wp_text.get_text_signature() != MinHashIndex.signature(u"Title a caf\xe9 b"):
+    print "> Unexpected text signature (source code received by chunks)"
+
+# Parser backends build the same nodes for well-formed source codes
+from website import WebSite
+seocheckmanager = WebSite("http://127.0.0.1/").seocheckmanager
+expected_check_dict = seocheckmanager.generate_webpage_check_dict(wp)
+
+for backend in WebPageParser.backends:
+    if backend not in WebPageParser.get_available_backends():
+        print "Check backend '%s' (skipped: not available)" % backend
+        continue
+
+    print "Check backend '%s'" % backend
+    for queries in (None, streaming_queries):
+        wp_backend = WebPageParser(queries, backend)
+        wp_backend.feed(htmlpage.decode('utf-8'))
+        for query in (queries or [check[0] for check in check_list]):
+            expected = [(res.get_tag(), res.get_attrs(), res.get_data()) for res in wp.find(query)]
+            result = [(res.get_tag(), res.get_attrs(), res.get_data()) for res in wp_backend.find(query)]
+            if result != expected:
+                print "> Unexpected result for '%s' - %d elements instead of %d" % (query, len(result), len(expected))
+
+    print "Check backend '%s' (check_dict)" % backend
+    wp_backend = WebPageParser(backend=backend)
+    for pos in range(0, len(htmlpage), 100): # source code received by chunks
+        wp_backend.feed(htmlpage[pos:pos+100].decode('utf-8'))
+    if seocheckmanager.generate_webpage_check_dict(wp_backend) != expected_check_dict:
+        print "> Unexpected check_dict"
+    if wp_backend.get_text_signature() != wp.get_text_signature():
+        print "> Unexpected text signature"
+
+# Compiled selectors are kept in a bounded LRU cache
+from cssselector import SelectorCache
+print "Check selector cache"
+cache = SelectorCache(2)
+selector_a = cache.get("a")
+cache.get("b")
+if cache.get("  a ") is not selector_a: # same normalized selector
+    print "> Selector 'a' should have been re-used"
+cache.get("c") # evicts b
+cache.get("b")
+if cache.get_stats() != (1, 4, 2):
+    print "> Unexpected statistics - %s instead of %s" % (cache.get_stats(), (1, 4, 2))
+cache.clear()
+cache.clear()
+WebPageNode.free_selector()
+WebPageNode.free_selector()
@@ -0,0 +1,83 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+from threading import Thread
+from webpageparser import WebPageParser, WebPageNode
+
+num_threads = 16
+num_iterations = 20
+
+htmlpage = u"""<html lang="en">
+<head>
+    <title>Shared tree</title>
+    <meta name="description" content="Tree queried by several threads at once" />
+    <link rel="shortcut icon" href="/favicon.ico" />
+</head>
+<body>
+    %s
+</body>
+</html>""" % u"\n".join([u"""<div class="block b%d" id="block-%d">
+        <h2>Block %d</h2>
+        <p><a href="/%d.html">internal</a> <a href="http://example.org/">external</a></p>
+        <img src="/%d.png" alt="image" /><img src="/%d-2.png" />
+    </div>""" % (i, i, i, i, i, i) for i in range(50)])
+
+queries = [
+    "html > head > title",
+    "html > head > link[rel~=icon]",
+    "head > meta[name=description][content]",
+    "a[href]",
+    "a[href^='/'] , a[href^='http://example.org/']",
+    "img[alt]",
+    "div.block > h2 + p",
+    "h2 ~ img",
+    ".b10 a , #block-20 img",
+    "* > p > *",
+]
+
+wp = WebPageParser()
+wp.feed(htmlpage)
+
+# Expected results computed by a single thread
+expected = dict()
+for query in queries:
+    expected[query] = [node.get_order() for node in wp.find(query)]
+
+errors = list()
+
+def run(thread_id):
+    try:
+        for i in range(num_iterations):
+            for query in queries:
+                # Some threads also empty the selector cache while the others are using it
+                if thread_id % 4 == 0 and i % 5 == 0:
+                    WebPageNode.free_selector()
+
+                result = [node.get_order() for node in wp.find(query)]
+                if result != expected[query]:
+                    errors.append("'%s' - %d elements instead of %d" % (query, len(result), len(expected[query])))
+
+                result = [node.get_order() for node in wp.find(query, wp.document_roots)]
+                if result != expected[query]:
+                    errors.append("'%s' (tree) - %d elements instead of %d" % (query, len(result), len(expected[query])))
+
+            result = wp.find_many(queries)
+            for query in queries:
+                if [node.get_order() for node in result[query]] != expected[query]:
+                    errors.append("'%s' (find_many) - %d elements instead of %d" % (query, len(result[query]), len(expected[query])))
+    except Exception as e:
+        errors.append("Exception in thread %d: %s" % (thread_id, repr(e)))
+
+print "Check find from %d threads" % num_threads
+threads = [Thread(target=run, args=(thread_id,)) for thread_id in range(num_threads)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+
+for error in errors[:10]:
+    print "> %s" % error
+if len(errors) > 10:
+    print "> ... %d errors" % len(errors)
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+
+import sys
+sys.path.insert(0, '../src/')
+
+import random
+from webpage import WebPage
+from website import WebSite
+from minhashindex import MinHashIndex
+
+random.seed(0)
+vocabulary = ["word%d" % i for i in range(3000)]
+text_a = u" ".join([random.choice(vocabulary) for i in range(400)])
+text_b = u" ".join([random.choice(vocabulary) for i in range(400)])
+
+def get_extraction(title=None, text=u"", links=[], ressources=[]):
+    return {
+        "check_dict": None,
+        "ressources": ressources,
+        "documents": [],
+        "nofollow": False,
+        "links": [(url, False) for url in links],
+        "noindex": False,
+        "title": title,
+        "description": None,
+        "minhash": MinHashIndex.signature(text),
+    }
+
+def snapshot(pages):
+    """
+    Return a snapshot (cf. Checkpoint) of a crawl whose pages are (title, text)
+    every page is linked by the start page
+    """
+
+    states = list()
+    for i in range(len(pages)):
+        webpage = WebPage("http://example.com/%d.html" % i, min(i, 1))
+        webpage.scanned = True
+        webpage.status = 200
+        links = ["/%d.html" % j for j in range(1, len(pages))] if i == 0 else []
+        webpage.extraction = get_extraction(pages[i][0], pages[i][1], links)
+        states.append(webpage.get_state())
+    return {"webpages": states, "cursor": len(states)}
+
+def get_duplicates(website):
+    return (website.titles_index_.get_groups(), [[webpage.id for webpage in cluster] for cluster in website.minhashindex_.get_clusters()])
+
+# The data of a crawl does not survive to the next one on the same WebSite
+crawl_duplicates = snapshot([("home", text_a), ("page", text_b), ("other", u"short text"), ("page", text_b)])
+crawl_unique = snapshot([("home", text_b), ("page", text_a), ("other", u"short text")])
+expected_duplicates = ([[1, 3]], [[1, 3]])
+
+website = WebSite("http://example.com/")
+print "Check duplicates of a first crawl"
+website.restore(crawl_duplicates, False, False)
+if get_duplicates(website) != expected_duplicates:
+    print "> Unexpected duplicates - %s instead of %s" % (repr(get_duplicates(website)), repr(expected_duplicates))
+
+print "Check duplicates of a second crawl"
+website.restore(crawl_unique, False, False)
+if get_duplicates(website) != ([], []):
+    print "> Duplicates of the previous crawl - %s" % repr(get_duplicates(website))
+
+print "Check duplicates of a third crawl"
+website.restore(crawl_duplicates, False, False)
+if get_duplicates(website) != expected_duplicates:
+    print "> Unexpected duplicates - %s instead of %s" % (repr(get_duplicates(website)), repr(expected_duplicates))
+
+# Only the crawled HTML webpages are part of the link graph
+print "Check link graph"
+webpages = [
+    ("http://example.com/", 200, True, get_extraction(links=["/a.html", "/missing.html", "/img.html", "http://example.org/"], ressources=["/img.html"])),
+    ("http://example.com/a.html", 200, True, get_extraction(links=["/", "/img.html"])),
+    ("http://example.com/missing.html", 404, True, None),
+    ("http://example.com/img.html", 200, False, None), # ressource, only verified
+    ("http://example.org/", 200, False, None),
+]
+states = list()
+for url, status, scanned, extraction in webpages:
+    webpage = WebPage(url, 0 if url == "http://example.com/" else 1, url.startswith("http://example.com/"))
+    webpage.scanned = scanned
+    webpage.status = status
+    webpage.extraction = extraction
+    states.append(webpage.get_state())
+website.restore({"webpages": states, "cursor": len(states)}, False, False)
+website.analyse_links()
+graph = [(webpage.click_depth, webpage.num_inlinks) for webpage in website.webpages]
+if graph != [(0, 1), (1, 1), (None, None), (None, None), (None, None)]:
+    print "> Unexpected click depths and inlinks - %s" % repr(graph)
+if abs(website.webpages[0].pagerank + website.webpages[1].pagerank - 1.) > 1e-6:
+    print "> PageRank lost by pages out of the graph - %s" % repr([webpage.pagerank for webpage in website.webpages])
+if website.count_links() != ([3, 2, 0, 0, 0], [1, 0, 0, 0, 0]):
+    print "> Unexpected number of links - %s" % repr(website.count_links())
+
+# Click depths are counted from the first webpage of the graph when the start page is not part of it
+print "Check link graph without the start page"
+webpages = [
+    ("http://example.com/", 301, None),
+    ("http://example.com/en/", 200, get_extraction(links=["/en/a.html"])),
+    ("http://example.com/en/a.html", 200, get_extraction(links=["/en/"])),
+]
+states = list()
+for url, status, extraction in webpages:
+    webpage = WebPage(url, 0 if url == "http://example.com/" else 1)
+    webpage.scanned = True
+    webpage.status = status
+    webpage.extraction = extraction
+    states.append(webpage.get_state())
+website.restore({"webpages": states, "cursor": len(states)}, False, False)
+website.analyse_links()
+graph = [(webpage.click_depth, webpage.num_inlinks) for webpage in website.webpages]
+if graph != [(None, None), (0, 1), (1, 1)]:
+    print "> Unexpected click depths and inlinks - %s" % repr(graph)